@@ -0,0 +1,6 @@
+"""
+Presentation-ready, interactive plots of all known exoplanets.
+
+Run ``python -m exoplots build`` from the top level of the repository to load
+the latest data tables and regenerate every figure in ``_includes/``.
+"""
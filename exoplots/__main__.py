@@ -0,0 +1,135 @@
+"""
+Command line interface. Run from the top level of the repository, e.g.
+
+    python -m exoplots download
+    python -m exoplots build
+"""
+import argparse
+
+from . import profiling
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m exoplots')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    # options for the commands that can be profiled
+    profiled = argparse.ArgumentParser(add_help=False)
+    profiled.add_argument('--profile', nargs='?', const='memory',
+                          choices=profiling.LEVELS,
+                          help='record how long each stage takes (and with '
+                               'memory or cprofile, more) and save it to '
+                               'data/metrics. Also turned on by setting '
+                               f'{profiling.ENVIRONMENT}')
+
+    build = commands.add_parser('build', parents=[profiled],
+                                help='regenerate all the figures')
+    build.add_argument('--no-cache', dest='cache', action='store_false',
+                       help='ignore any cached copies of the data tables and '
+                            'crossmatches')
+    build.add_argument('-j', '--jobs', type=int, default=1,
+                       help='number of figures to render in parallel '
+                            '(0 for one per core)')
+    build.add_argument('-f', '--force', action='store_true',
+                       help='remake every figure even if its inputs are '
+                            'unchanged')
+    build.add_argument('-n', '--dry-run', action='store_true',
+                       help='only list the figures that would be remade')
+    build.add_argument('--strict', action='store_true',
+                       help='fail if the data tables fail any checks')
+    build.add_argument('--sidecars', action='store_true',
+                       help='write the data of the embedded figures to '
+                            'separate files in assets/data that they load')
+    build.add_argument('--lod', action='store_true',
+                       help='show density grids in the candidates plot '
+                            'until it is zoomed in to few enough planets')
+    build.add_argument('--webgl', action='store_true',
+                       help='draw the planets in the candidates plot with '
+                            'WebGL')
+
+    download = commands.add_parser('download', parents=[profiled],
+                                   help='download the latest data tables')
+    download.add_argument('-j', '--jobs', type=int, default=None,
+                          help='number of tables to download at once '
+                               '(0 for all of them)')
+    download.add_argument('--timeout', type=float, default=None,
+                          help='seconds to wait for each archive')
+    download.add_argument('--nexsci', help='alternate NExSci API address')
+    download.add_argument('--exofop', help='alternate ExoFOP TOI address')
+
+    commands.add_parser('compile', help='compile the old KOI catalogs into '
+                                        'one file for faster loading')
+    check = commands.add_parser('validate', parents=[profiled],
+                                help='check the data tables for '
+                                     'consistency')
+    check.add_argument('--strict', action='store_true',
+                       help='exit with an error if any checks fail')
+    bench = commands.add_parser('benchmark', help='time each stage on made '
+                                                 'up tables of several sizes')
+    bench.add_argument('--scales', type=float, nargs='+', default=None,
+                       help='how many times bigger than the real tables '
+                            'to make the made up ones (default 1 10 100)')
+    bench.add_argument('-o', '--output', help='where to save the results')
+    bench.add_argument('--workdir', help='where to write the made up tables '
+                                         '(default a temporary directory)')
+    bench.add_argument('--seed', type=int, default=0,
+                       help='random seed for the made up tables')
+    bench.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                       help='compare two saved results instead')
+    commands.add_parser('memory', help='report how much memory the data '
+                                       'tables use')
+
+    args = parser.parse_args(args)
+
+    level = None
+    if 'profile' in args:
+        level = profiling.level(args.profile)
+    if level is not None:
+        profiling.start(args.command, level)
+    try:
+        _run(args)
+    finally:
+        profiling.finish()
+
+
+def _run(args):
+    if args.command == 'build':
+        from .build import build_all
+        build_all(cache=args.cache, jobs=args.jobs, force=args.force,
+                  dry_run=args.dry_run, strict=args.strict,
+                  data_sidecars=args.sidecars, lod=args.lod,
+                  webgl=args.webgl)
+    elif args.command == 'download':
+        from . import download as dl
+
+        urls = dl.table_urls(nexsci=args.nexsci or dl.NEXSCI_API,
+                             exofop=args.exofop or dl.EXOFOP_TOI)
+        jobs = dl.JOBS if args.jobs is None else args.jobs
+        timeout = dl.TIMEOUT if args.timeout is None else args.timeout
+        dl.download_all(urls=urls, jobs=jobs, timeout=timeout)
+    elif args.command == 'compile':
+        from .test_data import compile_koi_releases
+        compile_koi_releases()
+    elif args.command == 'validate':
+        from .test_data import get_discovery_year
+        from .utils import load_data
+        get_discovery_year(load_data(), strict=args.strict)
+    elif args.command == 'benchmark':
+        from . import benchmark
+        if args.compare:
+            benchmark.compare(*args.compare)
+        else:
+            scales = args.scales
+            if scales is not None:
+                # 10.0 -> 10 so the results are labeled the same way
+                scales = [int(ii) if ii == int(ii) else ii for ii in scales]
+            benchmark.run_all(scales=scales, output=args.output,
+                              workdir=args.workdir, seed=args.seed)
+    elif args.command == 'memory':
+        from .utils import memory_report
+        memory_report()
+
+
+if __name__ == "__main__":
+    main()
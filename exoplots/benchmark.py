@@ -0,0 +1,323 @@
+"""
+Time every stage of making the figures as the data tables grow.
+
+The benchmarks run on made up tables (see synthetic.py) at several multiples
+of the size of the real ones, so they don't need the network or the real
+data. Each stage is timed and its peak memory use measured, and the results
+are saved as JSON so that runs from different commits can be compared with
+`compare`.
+"""
+import json
+import os
+import time
+
+# how many times bigger than the real tables to make the made up ones
+SCALES = [1, 10, 100]
+
+# the figures hold every point in the HTML, so past this scale they are
+# too big to be worth making and only the data stages are run
+FIGURE_MAX_SCALE = 10
+
+# where the results go by default. {commit} is filled in
+RESULTS = 'benchmarks/results-{commit}.json'
+
+# every stage, in the order they run
+STAGES = ['parse', 'normalize', 'crossmatch', 'discovery year',
+          'aggregation', 'figures']
+
+
+def _commit():
+    import subprocess
+
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return out.stdout.strip()
+
+
+def _memory(field):
+    # a memory use figure of this process from Linux in MB, or None
+    try:
+        with open('/proc/self/status', 'r') as ff:
+            for line in ff:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak():
+    # start tracking the peak memory use of this process over again. only
+    # Linux can do this
+    try:
+        with open('/proc/self/clear_refs', 'w') as ff:
+            ff.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def measure(func, *args, **kwargs):
+    """
+    Run a function, timing it and tracking its peak memory use.
+
+    Anything the function prints is thrown away. On Linux the peak memory
+    use of the whole process is tracked, which costs nothing. Elsewhere we
+    fall back on tracemalloc, which only counts memory allocated through
+    Python and slows things down a lot, so the times aren't comparable
+    across the two.
+
+    Parameters
+    ----------
+    func : function
+    args, kwargs
+        Arguments to `func`.
+
+    Returns
+    -------
+    out
+        Whatever `func` returns.
+    stats : dict
+        Seconds it took, the peak memory use while it ran in MB, and how
+        that was measured.
+
+    """
+    import contextlib
+    import tracemalloc
+
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        rss = _reset_peak()
+        if not rss:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            out = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            if rss:
+                peak = _memory('VmHWM')
+            else:
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            if not rss:
+                tracemalloc.stop()
+    return out, {'seconds': round(seconds, 4), 'peak_mb': round(peak, 1),
+                 'memory': 'rss' if rss else 'tracemalloc'}
+
+
+def _parse():
+    from .utils import DATAFILES, read_table
+
+    return [read_table(name) for name in DATAFILES]
+
+
+def _crossmatch(dfcon, dfkoi, dfk2, dftoi):
+    from .crossmatch import CrossMatcher
+
+    matcher = CrossMatcher.from_confirmed(dfcon)
+    matcher.match(dfkoi['ra'], dfkoi['dec'], dfkoi['koi_period'])
+    matcher.match(dfk2['ra'], dfk2['dec'], dfk2['pl_orbper'])
+    matcher.match(dftoi['RA'], dftoi['Dec'], dftoi['period'])
+
+
+def _aggregate(dfcon, dfkoi, dfk2, dftoi):
+    from .planets_over_time import count_cube
+    from .utils import unify
+
+    count_cube(dfcon, dfkoi, dfk2, dftoi)
+    return unify(dfcon, dfkoi, dfk2, dftoi)
+
+
+def _figures(data, stats):
+    from .build import TASKS, _run_task
+
+    for itask, task in enumerate(TASKS):
+        _, stats[task['outputs'][0]] = measure(_run_task, itask, data)
+        stats[task['outputs'][0]]['bytes'] = sum(
+            os.path.getsize(ifile) for ifile in task['outputs'])
+
+
+def run_scale(scale, workdir, seed=0, figures=True):
+    """
+    Benchmark every stage on made up tables of one size.
+
+    Parameters
+    ----------
+    scale : float
+        How many times bigger than the real tables to make the made up ones.
+    workdir : str
+        Empty directory to write the tables and figures to.
+    seed : int, optional
+        Random seed for the made up tables. Default 0.
+    figures : bool, optional
+        Whether to make the figures. Default True.
+
+    Returns
+    -------
+    dict
+        Number of rows in each table, and the stats from `measure` for
+        making the tables and each stage.
+
+    """
+    import shutil
+
+    from . import columns
+    from .synthetic import write_catalogs
+    from .test_data import get_discovery_year
+    from .utils import normalize
+
+    theme = os.path.abspath('exoplots_theme.yaml')
+    rows, generate = measure(write_catalogs, workdir, scale=scale,
+                             seed=seed)
+    os.makedirs(os.path.join(workdir, '_includes'), exist_ok=True)
+    shutil.copy(theme, workdir)
+
+    # get the imports out of the way so they don't count against a stage
+    columns.signature()
+
+    stats = {}
+    here = os.getcwd()
+    os.chdir(workdir)
+    try:
+        tables, stats['parse'] = measure(_parse)
+        data, stats['normalize'] = measure(normalize, *tables)
+        del tables
+        _, stats['crossmatch'] = measure(_crossmatch, *data)
+        data, stats['discovery year'] = measure(get_discovery_year, data)
+        unified, stats['aggregation'] = measure(_aggregate, *data)
+        if figures:
+            stats['figures'] = {}
+            _figures(tuple(data) + (unified,), stats['figures'])
+    finally:
+        os.chdir(here)
+
+    return {'rows': rows, 'generate': generate, 'stages': stats}
+
+
+def _total(stage):
+    # figures are timed one at a time
+    if 'seconds' in stage:
+        return stage['seconds'], stage['peak_mb']
+    return (sum(ifig['seconds'] for ifig in stage.values()),
+            max([ifig['peak_mb'] for ifig in stage.values()] + [0]))
+
+
+def report(results):
+    """
+    Print a summary of benchmark results.
+
+    Parameters
+    ----------
+    results : dict
+        As returned by `run_all`.
+
+    """
+    for scale, res in results['scales'].items():
+        rows = ', '.join(f'{num:,} {name}' for name, num in
+                         res['rows'].items())
+        print(f'{scale}x: {rows}')
+        for name in STAGES:
+            if name not in res['stages']:
+                continue
+            seconds, peak = _total(res['stages'][name])
+            print(f'{name:>16}: {seconds:8.3f} s {peak:9.1f} MB peak')
+
+
+def run_all(scales=None, output=None, workdir=None, seed=0):
+    """
+    Benchmark every stage at each scale and save the results.
+
+    Parameters
+    ----------
+    scales : list of float, optional
+        Multiples of the size of the real tables to run. Defaults to
+        `SCALES`.
+    output : str, optional
+        Where to save the results. Defaults to `RESULTS` for the current
+        commit.
+    workdir : str, optional
+        Where to write the made up tables and figures, one subdirectory per
+        scale. Defaults to a temporary directory that is removed afterward.
+    seed : int, optional
+        Random seed for the made up tables. Default 0.
+
+    Returns
+    -------
+    dict
+        The results.
+
+    """
+    import platform
+    import shutil
+    import tempfile
+    from datetime import datetime
+
+    import bokeh
+    import numpy as np
+    import pandas as pd
+
+    if scales is None:
+        scales = SCALES
+    commit = _commit()
+    if output is None:
+        output = RESULTS.format(commit=commit)
+
+    results = {'commit': commit, 'date': datetime.now().isoformat(),
+               'python': platform.python_version(),
+               'numpy': np.__version__, 'pandas': pd.__version__,
+               'bokeh': bokeh.__version__, 'seed': seed, 'scales': {}}
+
+    tmp = workdir is None
+    if tmp:
+        workdir = tempfile.mkdtemp(prefix='exoplots-benchmark-')
+    try:
+        for scale in scales:
+            print(f'Running the benchmarks at {scale}x')
+            results['scales'][str(scale)] = run_scale(
+                scale, os.path.join(workdir, f'{scale}x'), seed=seed,
+                figures=scale <= FIGURE_MAX_SCALE)
+    finally:
+        if tmp:
+            shutil.rmtree(workdir)
+
+    report(results)
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as ff:
+        json.dump(results, ff, indent=1)
+        ff.write('\n')
+    print(f'Saved the results to {output}')
+    return results
+
+
+def compare(old, new):
+    """
+    Print how much faster or slower every stage got between two runs.
+
+    Parameters
+    ----------
+    old, new : str
+        Results files saved by `run_all`.
+
+    """
+    with open(old, 'r') as ff:
+        before = json.load(ff)
+    with open(new, 'r') as ff:
+        after = json.load(ff)
+
+    print(f'{before["commit"]} -> {after["commit"]}')
+    for scale, res in after['scales'].items():
+        if scale not in before['scales']:
+            continue
+        print(f'{scale}x:')
+        for name in STAGES:
+            if (name not in res['stages'] or
+                    name not in before['scales'][scale]['stages']):
+                continue
+            sec1, peak1 = _total(before['scales'][scale]['stages'][name])
+            sec2, peak2 = _total(res['stages'][name])
+            print(f'{name:>16}: {sec1:8.3f} -> {sec2:8.3f} s '
+                  f'({sec2 / max(sec1, 1e-9):5.2f}x), {peak1:9.1f} -> '
+                  f'{peak2:9.1f} MB peak')
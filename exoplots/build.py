@@ -0,0 +1,353 @@
+"""
+Regenerate every figure from a single load of the data tables.
+
+Loading the tables and matching the candidates to the confirmed planets is the
+slowest part of making the figures, so rather than have every figure do it for
+itself we do it once here and hand the same tables to each of them. The
+figures that plot planets from every table get them combined into one table
+(see `utils.unify`), which is also only made once.
+
+The figures don't depend on each other, so they can also be rendered in
+parallel. Worker processes get the tables by memory-mapping a Feather copy
+written once by the main process instead of having them pickled and sent over
+for every figure.
+
+Most nights only some of the data tables change, so we also keep a manifest of
+the hashes of every file each figure was made from and skip any figure whose
+inputs are all the same as last time.
+"""
+import datetime
+import json
+import os
+import sys
+import tempfile
+from glob import glob
+
+from . import columns, crossmatch, ledger, payload, period_mass
+from . import period_radius_candidates, period_radius_mission
+from . import planets_over_time, profiling, sidecars, test_data, utils
+from . import validate
+from .cache import file_hash, read_tables, write_tables
+from .ledger import discovery_years
+from .utils import DATAFILES, UPDATE_TIME, load_data
+
+# record of what every output file was made from. it gets committed along
+# with the figures so the nightly runs know what they can skip
+MANIFEST = 'data/build_manifest.json'
+
+# code and settings that every figure depends on
+COMMON_CODE = [utils.__file__, test_data.__file__, crossmatch.__file__,
+               columns.__file__, ledger.__file__, validate.__file__,
+               sidecars.__file__, payload.__file__, 'exoplots_theme.yaml']
+
+
+def _task(builder, outputs, data, kwargs=None, per_year=False, options=(),
+          unified=False):
+    """
+    Describe one figure that can be made independently of the others.
+
+    Parameters
+    ----------
+    builder : function
+        Creates the figure given the data tables and `kwargs`.
+    outputs : list of str
+        Every file the builder writes.
+    data : list of str
+        The data files the figure depends on. Globs are expanded when the
+        build runs. Every figure also depends on `UPDATE_TIME`, since they
+        all show when the data was last updated.
+    kwargs : dict, optional
+        Extra arguments to the builder.
+    per_year : bool, optional
+        Whether the figure has one bar per year through the current year, and
+        so has to be remade when the year changes.
+    options : list of str, optional
+        Build options (e.g. 'lod') the builder takes as keyword arguments of
+        the same name.
+    unified : bool, optional
+        Whether the builder takes the unified table instead of the separate
+        data tables. Default False.
+
+    """
+    code = [sys.modules[builder.__module__].__file__] + COMMON_CODE
+    data = list(data) + [UPDATE_TIME]
+    return dict(builder=builder, outputs=outputs, data=data, code=code,
+                kwargs=kwargs or {}, per_year=per_year,
+                options=list(options), unified=unified)
+
+
+# figures with candidates also need the confirmed table to sort out which
+# candidates have already been confirmed
+ALLDATA = list(DATAFILES.values())
+
+TASKS = [
+    _task(period_mass.build,
+          [period_mass.fullfile, period_mass.embedfile],
+          [DATAFILES['confirmed']], unified=True),
+    _task(period_radius_candidates.build,
+          [period_radius_candidates.fullfile,
+           period_radius_candidates.embedfile],
+          ALLDATA, options=['lod', 'webgl'], unified=True),
+    _task(period_radius_mission.build,
+          [period_radius_mission.fullfile, period_radius_mission.embedfile],
+          [DATAFILES['confirmed']], unified=True),
+]
+for ivar in planets_over_time.VARIANTS:
+    if ivar.startswith('confirmed'):
+        idata = [DATAFILES['confirmed']]
+    else:
+        # discovery years also come from the old KOI releases
+        idata = ALLDATA + test_data.EARLY_KOIS + [test_data.KOI_RELEASES,
+                                                  test_data.KOI_BUNDLE]
+    TASKS.append(_task(planets_over_time.build,
+                       list(planets_over_time.output_files(ivar)), idata,
+                       kwargs={'variants': [ivar]}, per_year=True))
+
+# names of the data tables handed to the figures: the separate tables and
+# then all of them combined
+TABLES = ['confirmed', 'koi', 'k2', 'toi', 'unified']
+
+# the data tables in each worker process
+_data = None
+
+
+def _run_task(itask, data, inputs=None):
+    """
+    Create one of the figures in `TASKS`.
+
+    The figure is made the same way every time its inputs are the same (see
+    `utils.stable_ids`), no matter which figures happened to be made before
+    it in the same process, so unchanged figures don't change on disk.
+    """
+    task = TASKS[itask]
+    if inputs is None:
+        inputs = _inputs(task, {})
+    sidecars.enable('data sidecars' in inputs)
+    kwargs = dict(task['kwargs'])
+    kwargs.update({name: name in inputs for name in task['options']})
+    name = os.path.splitext(os.path.basename(task['outputs'][0]))[0]
+    tables = data[-1:] if task['unified'] else data[:-1]
+    try:
+        with profiling.stage(f'figure {name}'), \
+                utils.stable_ids(json.dumps(inputs, sort_keys=True)):
+            task['builder'](*tables, **kwargs)
+    except KeyError as err:
+        columns.report(err)
+        raise
+
+
+def _init_worker(files, data, profile):
+    global _data
+    if profile is not None:
+        profiling.start(None, *profile)
+    if files is not None:
+        data = read_tables(files)
+    _data = data
+
+
+def _worker_task(itask, inputs):
+    _run_task(itask, _data, inputs)
+    # send back what was recorded about the figure
+    return profiling.collect()
+
+
+def _inputs(task, hashes, data_sidecars=False, options=None):
+    """
+    Everything a figure depends on and its current hash.
+
+    Parameters
+    ----------
+    task : dict
+        One of the `TASKS`.
+    hashes : dict
+        Already computed file hashes, which are reused and added to.
+    data_sidecars : bool, optional
+        Whether the figure's data goes in separate files (see sidecars.py).
+        Default False.
+    options : dict, optional
+        Which build options are on, e.g. {'lod': True}. Only those the task
+        takes count.
+
+    Returns
+    -------
+    dict
+
+    """
+    files = []
+    for ifile in task['data']:
+        files += sorted(glob(ifile)) if '*' in ifile else [ifile]
+    files += task['code']
+
+    inputs = {}
+    for ifile in files:
+        ifile = os.path.relpath(ifile)
+        if ifile not in hashes:
+            hashes[ifile] = file_hash(ifile) if os.path.exists(ifile) else None
+        inputs[ifile] = hashes[ifile]
+    if task['per_year']:
+        inputs['current year'] = str(datetime.datetime.now().year)
+    if data_sidecars:
+        inputs['data sidecars'] = sidecars.SIDECARS
+    # only options that are on are recorded, so figures made without any
+    # aren't remade just for having the option
+    for name in task['options']:
+        if (options or {}).get(name):
+            inputs[name] = True
+    return inputs
+
+
+def load_manifest():
+    """
+    Load the record of what every output file was last made from.
+
+    Returns
+    -------
+    dict
+        For each output file, the hash of the file itself and the hashes of
+        all of its inputs.
+
+    """
+    if not os.path.exists(MANIFEST):
+        return {}
+    with open(MANIFEST, 'r') as ff:
+        return json.load(ff)
+
+
+def out_of_date(force=False, data_sidecars=False, options=None):
+    """
+    Figure out which of the `TASKS` need to be rerun.
+
+    A figure is out of date if any of its outputs are missing or have been
+    changed since they were made, or if any of its inputs have changed.
+
+    Parameters
+    ----------
+    force : bool, optional
+        Consider every figure out of date. Default False.
+    data_sidecars : bool, optional
+        Whether the figures' data goes in separate files. Default False.
+    options : dict, optional
+        Which build options are on (see `_inputs`).
+
+    Returns
+    -------
+    stale : list of int
+        Which of the `TASKS` need to be rerun.
+    inputs : list of dict
+        The current inputs of every task.
+
+    """
+    manifest = load_manifest()
+    hashes = {}
+    inputs = [_inputs(task, hashes, data_sidecars, options)
+              for task in TASKS]
+
+    stale = []
+    for itask, task in enumerate(TASKS):
+        for ifile in task['outputs']:
+            old = manifest.get(ifile)
+            if (force or old is None or not os.path.exists(ifile) or
+                    old['inputs'] != inputs[itask] or
+                    old['hash'] != file_hash(ifile)):
+                stale.append(itask)
+                break
+    return stale, inputs
+
+
+def build_all(cache=True, jobs=1, force=False, dry_run=False,
+              strict=False, data_sidecars=False, lod=False, webgl=False):
+    """
+    Load the data tables and create every figure that is out of date.
+
+    Parameters
+    ----------
+    cache : bool, optional
+        Whether to use the cached copy of the cleaned up data tables.
+        Default True.
+    jobs : int, optional
+        How many figures to create at once in separate processes. Values less
+        than 1 use every available core. Default 1.
+    force : bool, optional
+        Remake every figure even if its inputs haven't changed. Default False.
+    dry_run : bool, optional
+        Only list the files that would be remade. Default False.
+    strict : bool, optional
+        Stop without making any figures if the data tables fail any checks
+        (see `validate`). Default False.
+    data_sidecars : bool, optional
+        Write the data of the embedded figures to separate files that they
+        load, instead of inlining it (see sidecars.py). Default False.
+    lod : bool, optional
+        Show density grids in the candidates plot until it's zoomed in (see
+        `period_radius_candidates.build`). Default False.
+    webgl : bool, optional
+        Draw the planets in the candidates plot with WebGL. Default False.
+
+    Returns
+    -------
+    list of str
+        The output files that were (or would be) remade.
+
+    """
+    stale, inputs = out_of_date(force=force, data_sidecars=data_sidecars,
+                                options={'lod': lod, 'webgl': webgl})
+    remade = [ifile for itask in stale for ifile in TASKS[itask]['outputs']]
+
+    if dry_run or len(stale) == 0:
+        if len(stale) == 0:
+            print('All figures are up to date.')
+        for ifile in remade:
+            print(f'Would rebuild {ifile}')
+        return remade
+
+    # get_discovery_year also checks the tables for consistency and only adds
+    # columns, so every figure can work off of its output. if the tables
+    # haven't changed, the years it found last time are in the ledger
+    data = discovery_years(load_data(cache=cache), cache=cache,
+                           strict=strict)
+    with profiling.stage('unify'):
+        data = tuple(data) + (utils.unify(*data),)
+
+    if jobs < 1:
+        jobs = os.cpu_count()
+    jobs = min(jobs, len(stale))
+
+    if jobs == 1:
+        for itask in stale:
+            _run_task(itask, data, inputs[itask])
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = [os.path.join(tmpdir, f'{name}.feather')
+                     for name in TABLES]
+            # fall back to sending each worker its own copy of the tables
+            if write_tables(files, data):
+                initargs = (files, None, profiling.settings())
+            else:
+                initargs = (None, data, profiling.settings())
+
+            with ProcessPoolExecutor(max_workers=jobs,
+                                     initializer=_init_worker,
+                                     initargs=initargs) as pool:
+                # raise any errors from the workers
+                for stages in pool.map(_worker_task, stale,
+                                       [inputs[itask] for itask in stale]):
+                    profiling.extend(stages)
+
+    # remember what everything we just made came from
+    manifest = load_manifest()
+    for itask in stale:
+        for ifile in TASKS[itask]['outputs']:
+            manifest[ifile] = {'hash': file_hash(ifile),
+                               'inputs': inputs[itask]}
+    with open(MANIFEST, 'w') as ff:
+        json.dump(manifest, ff, indent=1, sort_keys=True)
+        ff.write('\n')
+
+    # clear out any data files left over from older versions of the figures
+    outputs = [ifile for task in TASKS for ifile in task['outputs']]
+    for ifile in sidecars.prune(outputs):
+        print(f'Removed {ifile}')
+
+    return remade
@@ -0,0 +1,188 @@
+"""
+On-disk cache of the normalized data tables.
+
+Parsing the full CSVs and running all the cleanup in `load_data` takes far
+longer than just reading back the finished tables, so we keep a copy of them
+in Feather format. The cache is keyed by the contents of every source file and
+a version number for the normalization code, so any change to either one
+automatically causes a rebuild.
+"""
+import hashlib
+import os
+from glob import glob
+
+# where the cached tables live
+CACHE_DIR = 'data/cache'
+
+
+def file_hash(path, chunksize=1 << 20):
+    """
+    Hash the contents of a file.
+
+    Parameters
+    ----------
+    path : str
+        File to hash.
+    chunksize : int, optional
+        How many bytes to read at a time.
+
+    Returns
+    -------
+    str
+        Hex digest of the SHA-256 hash of the file.
+
+    """
+    hsh = hashlib.sha256()
+    with open(path, 'rb') as ff:
+        for chunk in iter(lambda: ff.read(chunksize), b''):
+            hsh.update(chunk)
+    return hsh.hexdigest()
+
+
+def cache_key(paths, version):
+    """
+    Create the key identifying one particular set of input files and
+    normalization code.
+
+    Parameters
+    ----------
+    paths : list of str
+        Source files the cached tables are derived from.
+    version : int or str
+        Version of the code that turns the source files into the tables.
+
+    Returns
+    -------
+    str
+
+    """
+    hsh = hashlib.sha256(f'version={version}\n'.encode())
+    for path in paths:
+        hsh.update(f'{path}={file_hash(path)}\n'.encode())
+    return hsh.hexdigest()[:16]
+
+
+def _cache_file(key, name):
+    return os.path.join(CACHE_DIR, f'{key}-{name}.feather')
+
+
+def read_tables(files):
+    """
+    Load a set of tables saved with `write_tables`.
+
+    The files are memory-mapped, so this is nearly free for the numeric
+    columns.
+
+    Parameters
+    ----------
+    files : list of str
+        Feather file holding each table.
+
+    Returns
+    -------
+    tuple of DataFrame
+
+    """
+    import numpy as np
+    from pyarrow import feather
+
+    dfs = []
+    for ifile in files:
+        df = feather.read_table(ifile, memory_map=True).to_pandas()
+        # Arrow gives back missing strings as None, but pandas gave us NaN
+        for col in df.select_dtypes(object).columns:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+        dfs.append(df)
+    return tuple(dfs)
+
+
+def write_tables(files, dfs):
+    """
+    Save a set of tables in Feather format so they can be loaded back with
+    `read_tables`.
+
+    Parameters
+    ----------
+    files : list of str
+        Where to save each table.
+    dfs : list of DataFrame
+        The tables to save.
+
+    Returns
+    -------
+    bool
+        Whether all the tables were saved. Tables with columns Arrow can't
+        store (e.g. mixed strings and numbers) are skipped rather than
+        breaking the build.
+
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    for ifile, df in zip(files, dfs):
+        tmp = ifile + '.tmp'
+        try:
+            # uncompressed so that reads can be memory-mapped
+            feather.write_feather(df, tmp, compression='uncompressed')
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as err:
+            print(f'Unable to save {ifile}: {err}')
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        os.replace(tmp, ifile)
+    return True
+
+
+def read_cache(key, names):
+    """
+    Load a set of cached tables.
+
+    Parameters
+    ----------
+    key : str
+        Cache key from `cache_key`.
+    names : list of str
+        Name of each table in the set.
+
+    Returns
+    -------
+    tuple of DataFrame or None
+        The tables in the same order as `names`, or None if any of them
+        aren't in the cache.
+
+    """
+    files = [_cache_file(key, name) for name in names]
+    if not all(os.path.exists(ifile) for ifile in files):
+        return None
+    return read_tables(files)
+
+
+def write_cache(key, names, dfs):
+    """
+    Save a set of tables to the cache and remove any older versions of them.
+
+    Parameters
+    ----------
+    key : str
+        Cache key from `cache_key`.
+    names : list of str
+        Name of each table in the set.
+    dfs : list of DataFrame
+        The tables to save.
+
+    Returns
+    -------
+    bool
+        Whether the tables were cached.
+
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if not write_tables([_cache_file(key, name) for name in names], dfs):
+        return False
+
+    # clear out stale versions of these tables
+    for name in names:
+        for ifile in glob(os.path.join(CACHE_DIR, f'*-{name}.feather')):
+            if ifile != _cache_file(key, name):
+                os.remove(ifile)
+    return True
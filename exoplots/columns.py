@@ -0,0 +1,120 @@
+"""
+Registry of the columns of the data tables that we actually use.
+
+The archive tables have hundreds of columns, but the figures only need a few
+dozen of them. Every module that works with the tables lists the columns it
+uses in a module level ``COLUMNS`` dictionary, keyed by table name, and any
+columns it adds to the tables in ``NEW_COLUMNS``. From those we know which
+columns to ask the archive for and can drop the rest as soon as the tables
+are loaded.
+"""
+
+# the modules that declare what columns they use
+MODULES = ['utils', 'test_data', 'ledger', 'period_mass',
+           'period_radius_candidates', 'period_radius_mission',
+           'planets_over_time']
+
+
+def _declared(attr, table):
+    from importlib import import_module
+
+    cols = set()
+    for imod in MODULES:
+        mod = import_module(f'.{imod}', __package__)
+        cols.update(getattr(mod, attr, {}).get(table, []))
+    return cols
+
+
+def registered(table):
+    """
+    Every column of a table that is used or created anywhere.
+
+    Parameters
+    ----------
+    table : str
+        One of the tables in `utils.DATAFILES`.
+
+    Returns
+    -------
+    set of str
+
+    """
+    return _declared('COLUMNS', table) | _declared('NEW_COLUMNS', table)
+
+
+def download_columns(table):
+    """
+    The columns of a table that need to be downloaded.
+
+    Parameters
+    ----------
+    table : str
+        One of the tables in `utils.DATAFILES`.
+
+    Returns
+    -------
+    list of str
+        Sorted column names.
+
+    """
+    return sorted(_declared('COLUMNS', table) -
+                  _declared('NEW_COLUMNS', table))
+
+
+def signature():
+    """
+    A short string that changes whenever any table's registered columns do.
+
+    Returns
+    -------
+    str
+
+    """
+    import hashlib
+
+    from .utils import DATAFILES
+
+    text = ';'.join(f'{table}=' + ','.join(sorted(registered(table)))
+                    for table in DATAFILES)
+    return hashlib.sha256(text.encode()).hexdigest()[:8]
+
+
+def restrict(df, table):
+    """
+    Drop any columns of a table that aren't registered.
+
+    Anything that later tries to use an unregistered column will then fail
+    the same way whether or not the table was downloaded with every column.
+
+    Parameters
+    ----------
+    df : DataFrame
+    table : str
+        Which table `df` is.
+
+    Returns
+    -------
+    DataFrame
+
+    """
+    keep = registered(table)
+    return df.drop(columns=[col for col in df.columns if col not in keep])
+
+
+def report(err):
+    """
+    Explain a KeyError caused by using a column that isn't registered.
+
+    Parameters
+    ----------
+    err : KeyError
+
+    """
+    from .utils import DATAFILES
+
+    col = err.args[0] if len(err.args) > 0 else None
+    if not isinstance(col, str):
+        return
+    if not any(col in registered(table) for table in DATAFILES):
+        print(f'Column {col!r} is not in the column registry. Add it to '
+              f'COLUMNS in the module that uses it (see exoplots/columns.py).')
@@ -0,0 +1,67 @@
+"""
+Convert sexagesimal coordinate strings like the ones in the ExoFOP TOI list
+into degrees.
+
+astropy's Angle can do this, but it is slow to import and parses every string
+individually. These tables only ever use the plain hh:mm:ss.s and
++-dd:mm:ss.s formats, so all of them can be parsed at once instead.
+"""
+import numpy as np
+
+# optional sign, then whole degrees/hours and minutes and decimal seconds
+SEXAGESIMAL = r'^\s*([+-]?)(\d+):(\d+):(\d+(?:\.\d*)?)\s*$'
+
+# degrees per hour of right ascension. astropy converts units by way of
+# radians, which makes this a hair under 15, so do the same to match it
+HOURS_TO_DEGREES = (np.pi / 12) / (np.pi / 180)
+
+
+def parse_sexagesimal(values, hours=False):
+    """
+    Convert sexagesimal strings into degrees.
+
+    Gives exactly the same values as
+    ``Angle(values, unit='hourangle').degree`` (or ``unit='degree'``).
+
+    Parameters
+    ----------
+    values : array_like of str
+        Strings of the form 'dd:mm:ss.s', optionally with a leading sign.
+    hours : bool, optional
+        Whether the first field is in hours instead of degrees, e.g. for
+        right ascension. Default False.
+
+    Returns
+    -------
+    degrees : ndarray
+        The angles in degrees. Missing or malformed entries are NaN.
+    nbad : int
+        How many entries were malformed, not counting missing ones.
+
+    """
+    import pandas as pd
+
+    values = pd.Series(values)
+    missing = values.isna().to_numpy()
+    parts = values.astype(str).str.extract(SEXAGESIMAL)
+
+    negative = (parts[0] == '-').to_numpy()
+    first = parts[1].astype(float).to_numpy()
+    minutes = parts[2].astype(float).to_numpy()
+    seconds = parts[3].astype(float).to_numpy()
+
+    # same order of operations as astropy so we get identical values
+    angle = np.abs(first) + minutes / 60.0
+    angle += seconds / 3600.0
+    angle = np.where(negative, -angle, angle)
+
+    # anything out of range is as bad as anything that didn't match at all
+    with np.errstate(invalid='ignore'):
+        bad = (minutes >= 60) | (seconds >= 60)
+        if hours:
+            bad |= first > 24
+            angle *= HOURS_TO_DEGREES
+    bad |= np.isnan(angle)
+    angle[bad] = np.nan
+
+    return angle, int((bad & ~missing).sum())
@@ -0,0 +1,296 @@
+"""
+Match entries in the candidate tables (KOIs, K2 candidates, TOIs) to planets in
+the confirmed planets table by RA/Dec/Period.
+
+None of the candidate tables have a reliable link to the confirmed planets
+table, so we consider two entries to be the same planet if their RA, Dec, and
+orbital period are all within a small tolerance of each other. Rather than
+scanning the whole confirmed table for every candidate, we sort the confirmed
+planets by declination once and only test the planets that fall inside the
+declination band around each candidate.
+
+The matches hardly change from one night to the next, so the results for each
+candidate table are also kept in the on-disk cache (see `cached_match`) and
+only new or changed candidates are matched again.
+"""
+import numpy as np
+
+# how close RA and Dec (degrees) and period (days) have to be for two entries
+# to count as the same planet
+TOLERANCE = 1. / 60
+
+# extra width added to the declination band before the exact test so that
+# floating point rounding can't exclude a pair the exact test would keep
+_PAD = 1e-6
+
+# most candidate/confirmed pairs to test at once. crowded fields like the
+# Kepler field can have a lot of confirmed planets in each declination band
+CHUNK_PAIRS = 1 << 22
+
+# what the saved matches record as the way they were made
+RULE = 'ra/dec/period'
+
+
+class CrossMatcher:
+    """
+    Declination-sorted index of the confirmed planets that can answer every
+    candidate-to-confirmed match query for a table in one batch.
+
+    Two entries match if the absolute differences in RA, Dec, and period are
+    all strictly less than the tolerance, exactly as the old per-row
+    ``np.where`` scans did.
+
+    Parameters
+    ----------
+    ra : array_like
+        RA (degrees) of the confirmed planets.
+    dec : array_like
+        Dec (degrees) of the confirmed planets.
+    period : array_like
+        Orbital period (days) of the confirmed planets.
+    tol : float, optional
+        Matching tolerance in degrees (RA/Dec) and days (period). The default
+        is 1 arcminute and 1 minute.
+
+    """
+
+    def __init__(self, ra, dec, period, tol=TOLERANCE):
+        self.ra = np.asarray(ra, dtype=float)
+        self.dec = np.asarray(dec, dtype=float)
+        self.period = np.asarray(period, dtype=float)
+        self.tol = tol
+        # NaN declinations sort to the end and can never fall inside a band
+        self.order = np.argsort(self.dec, kind='stable')
+        self.sdec = self.dec[self.order]
+
+    @classmethod
+    def from_confirmed(cls, dfcon, tol=TOLERANCE):
+        """
+        Build the index from the confirmed planets table.
+
+        Parameters
+        ----------
+        dfcon : DataFrame
+            The confirmed planets table as returned by `load_data`.
+        tol : float, optional
+            Matching tolerance. Default is `TOLERANCE`.
+
+        Returns
+        -------
+        CrossMatcher
+
+        """
+        return cls(dfcon['ra'], dfcon['dec'], dfcon['pl_orbper'], tol=tol)
+
+    def pairs(self, ra, dec, period):
+        """
+        Find every (candidate, confirmed planet) pair that matches.
+
+        Parameters
+        ----------
+        ra, dec, period : array_like
+            Positions (degrees) and periods (days) of the candidates.
+
+        Returns
+        -------
+        iq : ndarray
+            Position of the candidate in the input arrays.
+        ic : ndarray
+            Position of the matching planet in the confirmed planets table.
+            Pairs are sorted by `iq` and then `ic`, so the matches for one
+            candidate are in the same order ``np.where`` would give them.
+
+        """
+        ra = np.asarray(ra, dtype=float)
+        dec = np.asarray(dec, dtype=float)
+        period = np.asarray(period, dtype=float)
+
+        # the range of the sorted confirmed table in each candidate's band
+        width = self.tol + _PAD
+        lo = np.searchsorted(self.sdec, dec - width, side='left')
+        hi = np.searchsorted(self.sdec, dec + width, side='right')
+        hi[~np.isfinite(dec)] = lo[~np.isfinite(dec)]
+        counts = hi - lo
+
+        # split the candidates up so we never test too many pairs at once
+        total = np.cumsum(counts)
+        edges = np.searchsorted(total, np.arange(CHUNK_PAIRS, total[-1],
+                                                 CHUNK_PAIRS)
+                                if total.size > 0 else [], side='right')
+        edges = np.unique(np.concatenate([[0], edges, [dec.size]]))
+
+        iqs = []
+        ics = []
+        for start, stop in zip(edges[:-1], edges[1:]):
+            cnt = counts[start:stop]
+            # expand the bands into one entry per possible pair
+            iq = np.repeat(np.arange(start, stop), cnt)
+            starts = np.repeat(lo[start:stop] - (np.cumsum(cnt) - cnt), cnt)
+            ic = self.order[starts + np.arange(cnt.sum())]
+
+            # the exact same test the per-row scans used
+            good = ((np.abs(self.ra[ic] - ra[iq]) < self.tol) &
+                    (np.abs(self.dec[ic] - dec[iq]) < self.tol) &
+                    (np.abs(self.period[ic] - period[iq]) < self.tol))
+            iqs.append(iq[good])
+            ics.append(ic[good])
+        iq = np.concatenate(iqs + [np.zeros(0, dtype=int)])
+        ic = np.concatenate(ics + [np.zeros(0, dtype=int)])
+
+        srt = np.lexsort((ic, iq))
+        return iq[srt], ic[srt]
+
+    def match(self, ra, dec, period):
+        """
+        Count the matches for every candidate and find the first one.
+
+        Parameters
+        ----------
+        ra, dec, period : array_like
+            Positions (degrees) and periods (days) of the candidates.
+
+        Returns
+        -------
+        nmatch : ndarray
+            Number of confirmed planets each candidate matches.
+        first : ndarray
+            Position in the confirmed planets table of the first match for
+            each candidate, or -1 if there were no matches.
+
+        """
+        size = np.asarray(dec).size
+        iq, ic = self.pairs(ra, dec, period)
+        nmatch = np.bincount(iq, minlength=size)
+        first = np.full(size, -1, dtype=int)
+        uq, ifirst = np.unique(iq, return_index=True)
+        first[uq] = ic[ifirst]
+        return nmatch, first
+
+
+def confirmed_key(dfcon, tol=TOLERANCE):
+    """
+    Identify the contents of the confirmed planets table that matches depend
+    on.
+
+    Parameters
+    ----------
+    dfcon : DataFrame
+        The confirmed planets table as returned by `load_data`.
+    tol : float, optional
+        Matching tolerance. Default is `TOLERANCE`.
+
+    Returns
+    -------
+    str
+
+    """
+    import hashlib
+
+    import pandas as pd
+
+    cols = ['pl_name', 'ra', 'dec', 'pl_orbper']
+    rows = pd.util.hash_pandas_object(dfcon[cols], index=False)
+    hsh = hashlib.sha256(f'tol={tol!r}\n'.encode())
+    hsh.update(rows.to_numpy().tobytes())
+    return hsh.hexdigest()[:16]
+
+
+def cached_match(dfcon, table, ids, ra, dec, period, disp=None,
+                 tol=TOLERANCE, cache=True):
+    """
+    Same as `CrossMatcher.match`, but reusing the saved matches of every
+    candidate that hasn't changed since the last time.
+
+    The saved matches of a table are thrown out whenever the confirmed
+    planets table changes. Otherwise only candidates that are new or whose
+    position or period changed are matched again.
+
+    Parameters
+    ----------
+    dfcon : DataFrame
+        The confirmed planets table as returned by `load_data`.
+    table : str
+        Which candidate table this is, e.g. 'toi'.
+    ids : array_like
+        Name of each candidate.
+    ra, dec, period : array_like
+        Positions (degrees) and periods (days) of the candidates.
+    disp : array_like, optional
+        Disposition of each candidate, saved along with the matches for
+        reference.
+    tol : float, optional
+        Matching tolerance. Default is `TOLERANCE`.
+    cache : bool, optional
+        Whether to use and update the saved matches. If False, every
+        candidate is matched from scratch. Default True.
+
+    Returns
+    -------
+    nmatch : ndarray
+        Number of confirmed planets each candidate matches.
+    first : ndarray
+        Position in the confirmed planets table of the first match for
+        each candidate, or -1 if there were no matches.
+
+    """
+    import pandas as pd
+
+    from .cache import read_cache, write_cache
+    from .profiling import stage
+
+    keys = ['id', 'ra', 'dec', 'period']
+    new = pd.DataFrame({
+        'id': np.asarray(ids).astype(str),
+        'ra': np.asarray(ra, dtype=float),
+        'dec': np.asarray(dec, dtype=float),
+        'period': np.asarray(period, dtype=float),
+        'disp': (np.asarray(disp, dtype=object) if disp is not None else
+                 np.nan),
+    })
+
+    ckey = confirmed_key(dfcon, tol=tol)
+    name = f'{table}matches'
+    saved = read_cache(ckey, [name]) if cache else None
+    if saved is None:
+        nsaved = 0
+        new = new.assign(nmatch=np.nan, first=np.nan, pl_name=np.nan,
+                         distance=np.nan, dperiod=np.nan, rule=np.nan)
+    else:
+        # the same candidate can be in a table more than once
+        old = saved[0].drop(columns='disp').drop_duplicates(keys)
+        nsaved = len(saved[0])
+        new = new.merge(old, on=keys, how='left')
+    todo = new['nmatch'].isna().to_numpy()
+
+    with stage(f'crossmatch {table}'):
+        if todo.any():
+            matcher = CrossMatcher.from_confirmed(dfcon, tol=tol)
+            nmatch, first = matcher.match(new['ra'][todo], new['dec'][todo],
+                                          new['period'][todo])
+            new.loc[todo, 'nmatch'] = nmatch
+            new.loc[todo, 'first'] = first
+
+            # record which planet each candidate matched first and how closely
+            found = np.flatnonzero(todo)[first >= 0]
+            ifirst = first[first >= 0]
+            cdec = matcher.dec[ifirst]
+            dra = ((new['ra'].to_numpy()[found] - matcher.ra[ifirst]) *
+                   np.cos(np.radians(cdec)))
+            ddec = new['dec'].to_numpy()[found] - cdec
+            new.loc[found, 'pl_name'] = (
+                np.asarray(dfcon['pl_name'], dtype=object)[ifirst])
+            # in arcseconds
+            new.loc[found, 'distance'] = np.hypot(dra, ddec) * 3600
+            new.loc[found, 'dperiod'] = (new['period'].to_numpy()[found] -
+                                         matcher.period[ifirst])
+            new.loc[found, 'rule'] = RULE
+
+    new['nmatch'] = new['nmatch'].astype('int64')
+    new['first'] = new['first'].astype('int64')
+    # only save again if something changed
+    if cache and (todo.any() or len(new) != nsaved):
+        write_cache(ckey, [name], [new])
+    print(f'Matched {todo.sum()} new or changed {table} entries to the '
+          f'confirmed planets and reused {(~todo).sum()}.')
+
+    return new['nmatch'].to_numpy(), new['first'].to_numpy()
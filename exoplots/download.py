@@ -0,0 +1,330 @@
+"""
+Download the latest candidate and confirmed planet tables from NExSci and
+ExoFOP-TESS.
+
+The archives can take a while to respond, so the tables are downloaded at the
+same time rather than one after another. Tables that haven't changed since the
+last download are left alone, so nothing downstream has to be redone.
+
+Tables are written to disk exactly as the archives send them, a chunk at a
+time, rather than going through pandas.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+from .profiling import stage
+from .utils import DATAFILES, UPDATE_TIME
+
+NEXSCI_API = 'http://exoplanetarchive.ipac.caltech.edu/cgi-bin/nstedAPI/nph' \
+             '-nstedAPI'
+EXOFOP_TOI = 'https://exofop.ipac.caltech.edu/tess/download_toi.php'
+
+# ETag, Last-Modified, and hash of the last download of each table
+METADATA = 'data/download_metadata.json'
+
+# how long to wait on an archive before giving up, in seconds
+TIMEOUT = 300
+
+# bytes to read from the server at a time
+CHUNKSIZE = 1 << 20
+
+# how many tables to download at once
+JOBS = 4
+
+
+def table_urls(nexsci=NEXSCI_API, exofop=EXOFOP_TOI):
+    """
+    Where to get each of the data tables.
+
+    Parameters
+    ----------
+    nexsci : str, optional
+        NExSci API address. Can be pointed somewhere else for testing.
+    exofop : str, optional
+        ExoFOP-TESS TOI list address.
+
+    Returns
+    -------
+    dict
+        Download URL for each of the tables in `DATAFILES`.
+
+    """
+    from .columns import download_columns
+
+    # only ask NExSci for the columns we use
+    def query(table, name):
+        return (f'{nexsci}?table={table}&select=' +
+                ','.join(download_columns(name)))
+
+    return {
+        # The "exoplanets" table includes all confirmed planets and hosts in
+        # the archive with parameters derived from a single, published
+        # reference
+        'confirmed': query('exoplanets', 'confirmed'),
+        # full KOI table
+        'koi': query('cumulative', 'koi'),
+        # all the K2 candidates (or at least the ones they have put into this
+        # not-quite-complete table)
+        'k2': query('k2candidates', 'k2'),
+        # the TOI list from ExoFOP-TESS. ExoFOP can only send every column
+        'toi': exofop + '?sort=toi&output=csv',
+    }
+
+
+def _open(path, mode, compress):
+    import gzip
+
+    if compress:
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def fetch(url, outfile, timeout=TIMEOUT, etag=None, modified=None,
+          compress=False):
+    """
+    Stream the contents of `url` to `outfile` unless they haven't changed.
+
+    Parameters
+    ----------
+    url : str
+    outfile : str
+        Where to write the contents.
+    timeout : float, optional
+        Seconds to wait for the server before raising an error.
+    etag, modified : str, optional
+        ETag and Last-Modified headers from the last time we downloaded
+        `url`. If given, the server is asked to only send the contents if
+        they have changed since then.
+    compress : bool, optional
+        Whether to gzip `outfile`.
+
+    Returns
+    -------
+    nbytes : int
+        Size of the contents, or 0 if the server says they haven't changed
+        and `outfile` wasn't written.
+    sha : str or None
+        SHA-256 hash of the (uncompressed) contents.
+    headers : dict
+        The new ETag and Last-Modified headers, if the server sent them.
+
+    """
+    import hashlib
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    req = Request(url)
+    if etag:
+        req.add_header('If-None-Match', etag)
+    if modified:
+        req.add_header('If-Modified-Since', modified)
+
+    nbytes = 0
+    sha = hashlib.sha256()
+    try:
+        with urlopen(req, timeout=timeout) as resp, \
+                _open(outfile, 'wb', compress) as ff:
+            for chunk in iter(lambda: resp.read(CHUNKSIZE), b''):
+                ff.write(chunk)
+                sha.update(chunk)
+                nbytes += len(chunk)
+            headers = {'etag': resp.headers.get('ETag'),
+                       'modified': resp.headers.get('Last-Modified')}
+    except HTTPError as err:
+        if err.code != 304:
+            raise
+        return 0, None, {'etag': etag, 'modified': modified}
+    return nbytes, sha.hexdigest(), headers
+
+
+def check_csv(path, compress=False):
+    """
+    Make sure a downloaded table looks like a complete CSV file.
+
+    The file is read one row at a time, so this doesn't need to hold the
+    whole table in memory.
+
+    Parameters
+    ----------
+    path : str
+    compress : bool, optional
+        Whether the file is gzipped.
+
+    Returns
+    -------
+    int
+        Number of rows in the table, not counting the header.
+
+    Raises
+    ------
+    ValueError
+        If the header is missing or malformed (e.g. the archive sent back an
+        error message), any row doesn't have the same number of columns as
+        the header, or there are no rows.
+
+    """
+    import csv
+    import io
+
+    with _open(path, 'rb', compress) as ff:
+        reader = csv.reader(io.TextIOWrapper(ff, encoding='utf-8',
+                                             newline=''))
+        header = next(reader, [])
+        if (len(header) < 2 or '' in header or
+                len(set(header)) != len(header)):
+            raise ValueError(f'{path} has a bad header: {header[:5]}')
+
+        nrows = 0
+        for row in reader:
+            nrows += 1
+            if len(row) != len(header):
+                raise ValueError(f'Row {nrows} of {path} has {len(row)} '
+                                 f'columns instead of {len(header)}')
+    if nrows == 0:
+        raise ValueError(f'{path} has no rows')
+    return nrows
+
+
+def load_metadata():
+    """
+    Load what we know about the last download of each table.
+
+    Returns
+    -------
+    dict
+        URL, ETag, Last-Modified, and content hash for each table.
+
+    """
+    if not os.path.exists(METADATA):
+        return {}
+    with open(METADATA, 'r') as ff:
+        return json.load(ff)
+
+
+def download_table(name, url, timeout=TIMEOUT, meta=None):
+    """
+    Download one table and save it to its file in `DATAFILES` if it has
+    changed since last time.
+
+    Files ending in .gz are compressed as they are written.
+
+    Parameters
+    ----------
+    name : str
+        Which table this is.
+    url : str
+    timeout : float, optional
+        Seconds to wait for the server before raising an error.
+    meta : dict, optional
+        What we recorded about the last download of this table.
+
+    Returns
+    -------
+    nbytes : int
+        Size of the downloaded table, or 0 if the server didn't send it.
+    seconds : float
+        How long the download took.
+    meta : dict
+        What to record about this download. Has a 'changed' key saying
+        whether the table was changed.
+
+    """
+    outfile = DATAFILES[name]
+    compress = outfile.endswith('.gz')
+    # only trust what we know about the last download if it's for the same
+    # URL and we still have the file
+    if meta is None or meta['url'] != url or not os.path.exists(outfile):
+        meta = {'url': url, 'etag': None, 'modified': None, 'hash': None,
+                'rows': None}
+
+    tmpfile = outfile + '.part'
+    start = time.time()
+    try:
+        nbytes, sha, headers = fetch(url, tmpfile, timeout=timeout,
+                                     etag=meta['etag'],
+                                     modified=meta['modified'],
+                                     compress=compress)
+        seconds = time.time() - start
+
+        new = dict(meta, **headers)
+        new['changed'] = False
+        # some servers don't do conditional requests, so check for ourselves
+        if sha is not None and sha != meta['hash']:
+            new['rows'] = check_csv(tmpfile, compress=compress)
+            new['hash'] = sha
+            new['changed'] = True
+            os.replace(tmpfile, outfile)
+    finally:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+    return nbytes, seconds, new
+
+
+@stage('download')
+def download_all(urls=None, jobs=JOBS, timeout=TIMEOUT):
+    """
+    Download all the data tables that have changed.
+
+    The update time in data/last_update_time.txt is only changed if at least
+    one of the tables was.
+
+    Parameters
+    ----------
+    urls : dict, optional
+        Download URL for each table. Defaults to `table_urls()`.
+    jobs : int, optional
+        How many tables to download at once. Values less than 1 download
+        them all at once.
+    timeout : float, optional
+        Seconds to wait for each server before raising an error.
+
+    Returns
+    -------
+    list of str
+        The tables that changed.
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if urls is None:
+        urls = table_urls()
+    if jobs < 1:
+        jobs = len(urls)
+
+    metadata = load_metadata()
+
+    start = time.time()
+    names = list(urls)
+    for name in names:
+        print(f'Downloading {name} table from {urls[name]}')
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(download_table, name, urls[name], timeout,
+                               metadata.get(name)) for name in names]
+        # raise any errors before we claim the data has been updated
+        stats = {name: fut.result() for name, fut in zip(names, futures)}
+
+    changed = []
+    for name, (nbytes, seconds, meta) in stats.items():
+        if meta.pop('changed'):
+            changed.append(name)
+            status = 'updated'
+        else:
+            status = 'unchanged'
+        metadata[name] = meta
+        print(f'{name:>10}: {nbytes / 1e6:8.2f} MB in {seconds:6.1f} s, '
+              f'{meta.get("rows")} rows, {status}')
+    total = sum(nbytes for nbytes, _, _ in stats.values())
+    print(f'{"total":>10}: {total / 1e6:8.2f} MB in '
+          f'{time.time() - start:6.1f} s')
+
+    with open(METADATA, 'w') as ff:
+        json.dump(metadata, ff, indent=1, sort_keys=True)
+        ff.write('\n')
+
+    if len(changed) > 0:
+        with open(UPDATE_TIME, 'w') as ff:
+            ff.write(str(datetime.now()))
+
+    return changed
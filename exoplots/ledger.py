@@ -0,0 +1,224 @@
+"""
+Ledger of the discovery year of every planet and candidate.
+
+Working out discovery years means matching every candidate table against the
+confirmed planets and checking the results (see `get_discovery_year`). The
+answers only change when the tables do, so we keep them in a ledger in the
+data directory along with where each year came from. Figures can then take
+their discovery years straight from the ledger as long as none of the data
+tables or the code that fills in the years has changed.
+
+Every entry is identified by the table it's in, its name in that table, and
+which occurrence of that name it is (the K2 table lists some candidates more
+than once). When the tables do change, only the entries that are new or got a
+different year or source are updated, so the ledger's history shows exactly
+what changed and when.
+"""
+import os
+
+from .utils import DATAFILES
+
+# where the ledger is kept. it gets committed along with the figures
+LEDGER = 'data/discovery_years.csv'
+
+# bump this whenever what goes in the ledger changes
+LEDGER_VERSION = 1
+
+# the name that identifies an entry in each table
+IDS = {
+    'confirmed': 'pl_name',
+    'koi': 'kepoi_name',
+    'k2': 'epic_candname',
+    'toi': 'TOI',
+}
+
+# columns of the data tables used here (see columns.py)
+COLUMNS = {name: [col, 'year_disc', 'disc_source']
+           for name, col in IDS.items()}
+
+# the columns of the ledger itself
+FIELDS = ['table', 'id', 'occurrence', 'year_disc', 'disc_source', 'since']
+
+
+def inputs_key():
+    """
+    Identify everything discovery years depend on: the data tables, the old
+    KOI catalogs, and the code that works the years out.
+
+    Returns
+    -------
+    str
+
+    """
+    from glob import glob
+
+    from . import columns, crossmatch, test_data, utils, validate
+    from .cache import cache_key
+
+    paths = (list(DATAFILES.values()) + test_data.EARLY_KOIS +
+             sorted(glob(test_data.KOI_RELEASES)) +
+             [utils.__file__, test_data.__file__, crossmatch.__file__,
+              validate.__file__, __file__])
+    # the key is committed along with the ledger, so it can't depend on
+    # where the repository is checked out
+    paths = [os.path.relpath(ii) for ii in paths]
+    return cache_key(paths, f'{LEDGER_VERSION}-{columns.signature()}')
+
+
+def _entries(data):
+    import pandas as pd
+
+    entries = []
+    for name, df in zip(DATAFILES, data):
+        ids = df[IDS[name]].astype(str)
+        entries.append(pd.DataFrame({
+            'table': name,
+            'id': ids.to_numpy(),
+            'occurrence': ids.groupby(ids).cumcount().to_numpy(),
+            'year_disc': df['year_disc'].to_numpy(dtype='int64'),
+            'disc_source': df['disc_source'].to_numpy(),
+        }))
+    return pd.concat(entries, ignore_index=True)
+
+
+def read_ledger():
+    """
+    Load the ledger.
+
+    Returns
+    -------
+    key : str or None
+        The `inputs_key` the ledger was last updated for, or None if there
+        is no ledger yet.
+    ledger : DataFrame or None
+        One row per table entry.
+
+    """
+    import pandas as pd
+
+    if not os.path.exists(LEDGER):
+        return None, None
+    with open(LEDGER, 'r') as ff:
+        key = ff.readline().split()[-1]
+        ledger = pd.read_csv(ff, dtype={'id': str}, keep_default_na=False)
+    return key, ledger
+
+
+def update_ledger(data):
+    """
+    Fold the discovery years of a set of tables into the ledger.
+
+    Entries that are new or whose discovery year or source changed are
+    marked with the date of the current data tables. Everything else keeps
+    the date it was last changed, and entries that are no longer in the
+    tables are dropped.
+
+    Parameters
+    ----------
+    data : tuple of DataFrame
+        The (dfcon, dfkoi, dfk2, dftoi) tables as returned by
+        `get_discovery_year`.
+
+    Returns
+    -------
+    DataFrame
+        The updated ledger.
+
+    """
+    from .utils import get_update_time
+
+    keys = ['table', 'id', 'occurrence']
+    ledger = _entries(data)
+    _, old = read_ledger()
+    if old is None:
+        old = ledger.iloc[:0].assign(since='')
+    ledger = ledger.merge(old, on=keys, how='left', suffixes=('', '_old'))
+    found = ledger['year_disc_old'].notna()
+    changed = ((ledger['year_disc'] != ledger['year_disc_old']) |
+               (ledger['disc_source'] != ledger['disc_source_old']))
+    ledger.loc[changed, 'since'] = get_update_time().strftime('%Y-%m-%d')
+    ledger = ledger[FIELDS]
+
+    with open(LEDGER, 'w') as ff:
+        ff.write(f'# inputs {inputs_key()}\n')
+        ledger.to_csv(ff, index=False)
+    print(f'Discovery year ledger: {(~found).sum()} new, '
+          f'{(found & changed).sum()} changed, {len(old) - found.sum()} '
+          f'removed, and {(~changed).sum()} unchanged entries.')
+    return ledger
+
+
+def apply_ledger(data):
+    """
+    Fill in the discovery years of a set of tables from the ledger.
+
+    Parameters
+    ----------
+    data : tuple of DataFrame
+        The (dfcon, dfkoi, dfk2, dftoi) tables as returned by `load_data`.
+        They are updated in place.
+
+    Returns
+    -------
+    tuple of DataFrame or None
+        The tables with year_disc and disc_source columns, or None if the
+        ledger is missing or out of date.
+
+    """
+    key, ledger = read_ledger()
+    if key is None or key != inputs_key():
+        return None
+
+    for name, df in zip(DATAFILES, data):
+        sub = ledger[ledger['table'] == name]
+        ids = df[IDS[name]].astype(str)
+        if (len(sub) != len(df) or
+                (sub['id'].to_numpy() != ids.to_numpy()).any()):
+            return None
+        # the confirmed table keeps the type of its own discovery years
+        dtype = df['pl_disc'].dtype if name == 'confirmed' else 'int64'
+        df['year_disc'] = sub['year_disc'].to_numpy().astype(dtype)
+        df['disc_source'] = sub['disc_source'].to_numpy()
+    return data
+
+
+def discovery_years(data=None, cache=True, strict=False):
+    """
+    Get the discovery year of everything in the tables, from the ledger if
+    it is up to date and by matching up the tables otherwise.
+
+    Parameters
+    ----------
+    data : tuple of DataFrame, optional
+        The (dfcon, dfkoi, dfk2, dftoi) tables as returned by `load_data`.
+        They are updated in place. If not given, they are loaded fresh.
+    cache : bool, optional
+        Whether to use the ledger, the cached tables, and the saved
+        crossmatches. The ledger is updated either way. Default True.
+    strict : bool, optional
+        Whether to raise an error if the tables fail any checks (see
+        `validate`). Default False.
+
+    Returns
+    -------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        Same as `get_discovery_year`.
+
+    """
+    from . import validate
+    from .test_data import get_discovery_year
+    from .utils import load_data
+
+    if data is None:
+        data = load_data(cache=cache)
+    if cache:
+        applied = apply_ledger(data)
+        if applied is not None:
+            print('Discovery years are up to date in the ledger.')
+            # the tables were checked when the ledger was last updated
+            validate.enforce(validate.load_report(), strict=strict)
+            return applied
+
+    data = get_discovery_year(data, strict=strict, cache=cache)
+    update_ledger(data)
+    return data
@@ -0,0 +1,256 @@
+"""
+Shrink the data the scatter plots send to the browser.
+
+Every point in a scatter plot carries its own copy of every column in its
+data source, so `optimize` cuts them down to what the figure actually uses:
+
+- columns nothing in the figure refers to (e.g. the host star) are dropped.
+- columns that are just another column scaled (e.g. the radius in Jupiter
+  radii) aren't sent at all. The tooltips work them out from the column they
+  come from instead, e.g. @jupradius{0.00} becomes @radius{0.00/11.21}.
+- numbers are sent as 32 instead of 64 bit floats wherever that doesn't
+  change what the tooltips show. Bokeh already sends numeric columns as
+  binary arrays, so this halves them.
+- text columns only shown in the tooltips that repeat a handful of values
+  (e.g. the discovery method) are sent as small integer codes into a list of
+  those values.
+"""
+import json
+import re
+
+# placeholders in tooltips and URLs, e.g. @planet, @{a b}, or @radius{0.00}
+FIELD = re.compile(r'@(\w+|{[^{}]+})(?:{([^{}]+)})?')
+
+# whether numbers can be sent as 32 bit floats
+FLOAT32 = True
+
+# only dictionary encode text columns with at most this many distinct values
+# per value sent
+REPEATS = 0.5
+
+# tooltip formatter for columns with scaled columns derived from them. an
+# optional number after a '/' in the format is divided out first
+SCALE = """
+const templating = Bokeh.require('core/util/templating');
+const parts = format.split('/');
+const scale = parts.length > 1 ? Number(parts[1]) : 1;
+return templating.DEFAULT_FORMATTERS.numeral(value / scale, parts[0],
+                                             special_vars);
+"""
+
+# tooltip formatter for dictionary encoded columns. {values} is filled in
+# with the list of values the codes point to
+LOOKUP = """
+return {values}[value];
+"""
+
+# the format that marks a dictionary encoded column in a tooltip. bokeh only
+# uses custom formatters for fields with a format
+CODED = 'value'
+
+
+def _name(field):
+    # @{a b} -> a b
+    return field[1:-1] if field.startswith('{') else field
+
+
+def _templates(fig):
+    # every tooltip and URL template in the figure, with the models and
+    # attributes they come from
+    from bokeh.models import HoverTool, OpenURL
+
+    out = []
+    for model in sorted(fig.references(), key=lambda ii: ii.id):
+        if isinstance(model, HoverTool) and isinstance(model.tooltips, list):
+            out.extend((model, ii, tip[1])
+                       for ii, tip in enumerate(model.tooltips))
+        elif isinstance(model, OpenURL):
+            out.append((model, None, model.url))
+    return out
+
+
+def _glyph_fields(fig):
+    # the columns every glyph in the figure is drawn from
+    from bokeh.models import GlyphRenderer
+
+    fields = set()
+    for model in fig.references():
+        if not isinstance(model, GlyphRenderer):
+            continue
+        for glyph in (model.glyph, model.selection_glyph,
+                      model.nonselection_glyph, model.hover_glyph,
+                      model.muted_glyph):
+            if glyph is None:
+                continue
+            for name in glyph.dataspecs():
+                spec = glyph.lookup(name).serializable_value(glyph)
+                if isinstance(spec, dict) and 'field' in spec:
+                    fields.add(spec['field'])
+    return fields
+
+
+def _decimals(fmt):
+    # how many decimal places a numeral format shows at most, e.g. 4 for
+    # 0,0[.][0000]
+    if '.' not in fmt:
+        return 0
+    return fmt.split('.', 1)[1].count('0')
+
+
+def _shown(values, fmt):
+    # what the tooltips show for some numbers with a (possibly scaled) format
+    import numpy as np
+
+    fmt, _, scale = fmt.partition('/')
+    return np.round(values / float(scale or 1), _decimals(fmt))
+
+
+def _set_tooltip(model, index, text):
+    if index is None:
+        model.url = text
+    else:
+        tips = list(model.tooltips)
+        tips[index] = (tips[index][0], text)
+        model.tooltips = tips
+
+
+def _add_formatter(templates, column, formatter):
+    # use a formatter for a column in every hover tool that shows it
+    from bokeh.models import HoverTool
+
+    hovers = {model for model, _, _ in templates
+              if isinstance(model, HoverTool)}
+    for hover in sorted(hovers, key=lambda ii: ii.id):
+        formatters = dict(hover.formatters)
+        formatters['@' + column] = formatter
+        hover.formatters = formatters
+
+
+def _size(sources):
+    # how many bytes the data in these sources takes up in the page
+    from bokeh.core.json_encoder import serialize_json
+    from bokeh.util.serialization import transform_column_source_data
+
+    return sum(len(serialize_json(transform_column_source_data(ii.data)))
+               for ii in sources)
+
+
+def optimize(fig, derived=None, float32=FLOAT32):
+    """
+    Cut the data in a figure down to what it needs to show.
+
+    Parameters
+    ----------
+    fig : bokeh.model.Model
+        The figure (or layout). Its data sources, tooltips, and hover tools
+        are changed in place.
+    derived : dict, optional
+        Columns that are another column divided by a number, e.g.
+        {'jupradius': ('radius', 11.21)}. They're dropped and the tooltips
+        that show them work them out in the browser instead.
+    float32 : bool, optional
+        Whether numbers can be sent with 32 bit precision where that doesn't
+        change what the tooltips show. Default `FLOAT32`.
+
+    Returns
+    -------
+    before, after : int
+        Bytes of data in the figure before and after.
+
+    """
+    import numpy as np
+    import pandas as pd
+    from bokeh.models import ColumnDataSource, CustomJSHover
+
+    derived = derived or {}
+    sources = sorted([ii for ii in fig.references()
+                      if type(ii) is ColumnDataSource], key=lambda ii: ii.id)
+    before = _size(sources)
+    templates = _templates(fig)
+
+    # tooltips work out the derived columns themselves
+    scaled = set()
+    for model, index, text in templates:
+        if index is None:
+            continue
+        for match in list(FIELD.finditer(text))[::-1]:
+            name = _name(match.group(1))
+            if name not in derived:
+                continue
+            column, ratio = derived[name]
+            scaled.add(column)
+            fmt = match.group(2) or '0,0[.][00]'
+            text = (text[:match.start()] + f'@{column}{{{fmt}/{ratio}}}' +
+                    text[match.end():])
+        _set_tooltip(model, index, text)
+    scale = CustomJSHover(code=SCALE)
+    for column in sorted(scaled):
+        _add_formatter(templates, column, scale)
+    templates = _templates(fig)
+
+    # every column used and how
+    drawn = _glyph_fields(fig)
+    used = set(drawn)
+    formats = {}
+    plain = set()
+    for model, index, text in templates:
+        for match in FIELD.finditer(text):
+            name = _name(match.group(1))
+            used.add(name)
+            if match.group(2) is not None:
+                formats.setdefault(name, []).append(match.group(2))
+            elif index is not None:
+                plain.add(name)
+    # only text just shown as is in the tooltips can be dictionary encoded
+    coded = plain - set(formats) - drawn
+    coded -= {_name(match.group(1)) for model, index, text in templates
+              if index is None for match in FIELD.finditer(text)}
+
+    for source in sources:
+        source.data = {col: val for col, val in source.data.items()
+                       if col in used}
+
+    # encode each text column the same way in every source
+    for column in sorted(coded):
+        columns = [np.asarray(ii.data[column]) for ii in sources
+                   if column in ii.data]
+        if not columns or any(ii.dtype != object for ii in columns):
+            continue
+        codes, uniques = pd.factorize(np.concatenate(columns), sort=True)
+        if (codes < 0).any() or len(uniques) > REPEATS * len(codes):
+            continue
+        codes = codes.astype(np.min_scalar_type(len(uniques)))
+        start = 0
+        for source in sources:
+            if column in source.data:
+                data = dict(source.data)
+                num = len(data[column])
+                data[column] = codes[start:start + num]
+                source.data = data
+                start += num
+
+        for model, index, text in _templates(fig):
+            if index is not None:
+                text = FIELD.sub(lambda mm: mm.group(0) if
+                                 _name(mm.group(1)) != column else
+                                 f'@{mm.group(1)}{{{CODED}}}', text)
+                _set_tooltip(model, index, text)
+        values = json.dumps([str(ii) for ii in uniques])
+        _add_formatter(templates, column,
+                       CustomJSHover(code=LOOKUP.format(values=values)))
+
+    if float32:
+        for source in sources:
+            data = dict(source.data)
+            for column, values in data.items():
+                values = np.asarray(values)
+                if values.dtype != np.float64:
+                    continue
+                single = values.astype(np.float32)
+                if all(np.array_equal(_shown(single.astype(np.float64), ii),
+                                      _shown(values, ii), equal_nan=True)
+                       for ii in formats.get(column, [])):
+                    data[column] = single
+            source.data = data
+
+    return before, _size(sources)
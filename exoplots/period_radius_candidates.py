@@ -0,0 +1,359 @@
+import numpy as np
+from bokeh import plotting
+from bokeh.models import CustomJS, FuncTickFormatter, HoverTool, IndexFilter
+from bokeh.models import OpenURL, TapTool
+from bokeh.models import Label, Legend, LegendItem, LogAxis, Range1d
+from bokeh.themes import Theme
+
+from .utils import get_update_time, load_data, log_axis_labels
+from .utils import save_figure
+
+# what order to plot things and what the legend labels will say
+missions = ['Kepler Candidate', 'Kepler Confirmed', 'K2 Candidate',
+            'K2 Confirmed', 'TESS Candidate', 'Other Confirmed',
+            'TESS Confirmed']
+
+# markers and colors in the same order as the missions above
+markers = ['circle_cross', 'circle', 'square_cross', 'square',
+           'inverted_triangle', 'diamond', 'triangle']
+# colorblind friendly palette from https://personal.sron.nl/~pault/
+# other ideas:
+# https://thenode.biologists.com/data-visualization-with-flying-colors/research/
+colors = ['#228833', '#228833', '#ee6677', '#ee6677', '#ccbb44', '#aa3377',
+          '#ccbb44']
+
+# this works off of the unified table (see utils.unify), so the columns it
+# uses are registered there
+
+# output files
+embedfile = '_includes/period_radius_candidates_embed.html'
+fullfile = '_includes/period_radius_candidates.html'
+
+# with lod on (build --lod), a density grid of each mission is shown when
+# zoomed out, and the individual planets are only drawn once there are fewer
+# than this many in view. makes the figure much faster on phones
+LOD_POINTS = 2000
+# number of log period and log radius bins in the density grid
+LOD_BINS = (60, 30)
+
+# to check the legend in this mode, build with --lod and open the full page:
+# no legend entry starts out greyed out, clicking one hides (or shows) that
+# mission both zoomed in and zoomed out, and it stays that way while zooming
+# until it's clicked again.
+
+# swaps between the density grid and the individual planets as the figure
+# is zoomed. hiding a mission in the legend hides both its planets and its
+# grid, so the swap is done by filtering out every point of the layer not in
+# use instead of hiding it, which would grey out its legend entry and undo
+# what the reader chose. only the missions still shown count toward the limit
+LOD_CODE = """
+let count = 0;
+for (const points of planets) {
+    if (!points.visible) {
+        continue;
+    }
+    const period = points.data_source.data['period'];
+    const radius = points.data_source.data['radius'];
+    for (let ii = 0; ii < period.length; ii++) {
+        if (period[ii] >= Math.min(x.start, x.end) &&
+            period[ii] <= Math.max(x.start, x.end) &&
+            radius[ii] >= Math.min(y.start, y.end) &&
+            radius[ii] <= Math.max(y.start, y.end)) {
+            count++;
+        }
+    }
+}
+const detail = count < limit;
+// only refilter when switching, not on every step of a pan
+for (const points of planets) {
+    if ((points.view.filters.length == 0) != detail) {
+        points.view.filters = detail ? [] : [hide];
+    }
+}
+for (const cells of grids) {
+    if ((cells.view.filters.length == 0) == detail) {
+        cells.view.filters = detail ? [hide] : [];
+    }
+}
+"""
+
+# what to display when hovering over a data point
+TOOLTIPS = [
+    ("Planet", "@planet"),
+    # only give the decimal and sig figs if needed
+    ("Period", "@period{0,0[.][0000]} days"),
+    ("Radius", "@radius{0,0[.][00]} Earth; @jupradius{0,0[.][0000]} Jup"),
+    ("Discovered by", "@discovery"),
+    ("Status", "@status")
+]
+
+
+def build(df, lod=False, webgl=False):
+    """
+    Create the period-radius figure of all confirmed transiting planets along
+    with the Kepler, K2, and TESS planet candidates.
+
+    Parameters
+    ----------
+    df : DataFrame
+        All the planets and candidates in one table, as returned by
+        `load_data` with unified=True.
+    lod : bool, optional
+        Whether to show a density grid of each mission until the figure is
+        zoomed in to fewer than `LOD_POINTS` planets. Default False.
+    webgl : bool, optional
+        Whether to draw the planets with WebGL, which is faster for many
+        points. The density grid has no WebGL version and is always drawn
+        normally. Default False.
+
+    """
+    # get the exoplot theme
+    theme = Theme(filename="./exoplots_theme.yaml")
+
+    # create the figure
+    fig = plotting.figure(x_axis_type='log', y_axis_type='log',
+                          tooltips=TOOLTIPS, plot_height=700,
+                          output_backend='webgl' if webgl else 'canvas')
+    # allow for something to happen when you click on data points
+    fig.add_tools(TapTool())
+
+    # need to store min and max radius values to create the second axis
+    ymin = 1
+    ymax = 1
+    # save the output plots to rearrange them in the legend
+    glyphs = []
+    counts = []
+    # the density grid of each mission, if any
+    grids = []
+
+    usable = (df['has_period'] & df['has_radius'] & df['transits'] &
+              df['recent'])
+
+    if lod:
+        # every mission's density grid has the same cells, evenly spaced in
+        # log period and log radius. anything not positive can't be drawn on
+        # log axes anyway
+        gridded = usable & (df['period'] > 0) & (df['radius_e'] > 0)
+        logper = np.log10(df['period'][gridded])
+        lograd = np.log10(df['radius_e'][gridded])
+        xedges = np.linspace(logper.min(), logper.max(), LOD_BINS[0] + 1)
+        yedges = np.linspace(lograd.min(), lograd.max(), LOD_BINS[1] + 1)
+        densest = np.log1p(np.histogram2d(logper, lograd,
+                                          bins=[xedges, yedges])[0].max())
+
+    for ii, imiss in enumerate(missions):
+        fac, status = imiss.split()
+        # select the appropriate set of planets for each mission. the
+        # candidate tables have their confirmed planets too, so only use the
+        # confirmed planets table for those
+        good = usable & (df['status'] == status)
+        if status == 'Confirmed':
+            good &= df['table'] == 'confirmed'
+        if fac == 'Other':
+            good &= ~df['mission'].isin(['Kepler', 'K2', 'TESS'])
+        else:
+            good &= df['mission'] == fac
+
+        # make the confirmed planets more opaque and bigger
+        if fac == 'Other':
+            alpha = 0.7
+            size = 8
+        elif status == 'Confirmed':
+            alpha = 0.7
+            size = 6
+        elif fac == 'TESS':
+            alpha = 0.6
+            size = 4
+        else:
+            alpha = 0.35
+            size = 4
+        counts.append(f'{good.sum():,}')
+
+        # what the hover tooltip draws its values from
+        source = plotting.ColumnDataSource(data=dict(
+                planet=df['name'][good],
+                period=df['period'][good],
+                radius=df['radius_e'][good],
+                jupradius=df['radius_j'][good],
+                host=df['host'][good],
+                discovery=df['mission'][good],
+                status=df['status'][good],
+                url=df['url'][good]
+                ))
+        print(imiss, ': ', good.sum())
+
+        # plot the planets
+        # nonselection stuff is needed to prevent planets in that category from
+        # disappearing when you click on a data point ("select" it)
+        glyph = fig.scatter('period', 'radius', color=colors[ii],
+                            source=source, size=size, alpha=alpha,
+                            marker=markers[ii],
+                            nonselection_alpha=alpha,
+                            nonselection_color=colors[ii])
+        glyphs.append(glyph)
+
+        if lod:
+            # how many planets in each cell, drawn more opaque the more
+            # there are
+            grid = np.histogram2d(logper[good[gridded]],
+                                  lograd[good[gridded]],
+                                  bins=[xedges, yedges])[0]
+            ix, iy = np.nonzero(grid)
+            cells = plotting.ColumnDataSource(data=dict(
+                left=10.**xedges[ix], right=10.**xedges[ix + 1],
+                bottom=10.**yedges[iy], top=10.**yedges[iy + 1],
+                alpha=0.15 + 0.7 * np.log1p(grid[ix, iy]) / densest))
+            grids.append(fig.quad(left='left', right='right',
+                                  bottom='bottom', top='top',
+                                  color=colors[ii], fill_alpha='alpha',
+                                  line_alpha=0, source=cells))
+        # save the global min/max
+        ymin = min(ymin, source.data['radius'].min())
+        ymax = max(ymax, source.data['radius'].max())
+
+    # set up where to send people when they click on a planet
+    url = "@url"
+    taptool = fig.select(TapTool)
+    taptool.callback = OpenURL(url=url)
+
+    if lod:
+        # only the planets can be hovered over and clicked on
+        taptool.renderers = glyphs
+        fig.select(HoverTool).renderers = glyphs
+        # start zoomed out on the density grid unless there are few enough
+        # planets to draw them all. the layer not in use has every point
+        # filtered out
+        hide = IndexFilter(indices=[])
+        detail = sum(len(ii.data_source.data['period'])
+                     for ii in glyphs) < LOD_POINTS
+        for glyph in glyphs:
+            glyph.view.filters = [] if detail else [hide]
+        for cells in grids:
+            cells.view.filters = [hide] if detail else []
+        swap = CustomJS(args=dict(planets=glyphs, grids=grids, hide=hide,
+                                  x=fig.x_range, y=fig.y_range,
+                                  limit=LOD_POINTS), code=LOD_CODE)
+        for rng in (fig.x_range, fig.y_range):
+            rng.js_on_change('start', swap)
+            rng.js_on_change('end', swap)
+        # hiding or showing a mission changes how many planets are in view
+        for glyph in glyphs:
+            glyph.js_on_change('visible', swap)
+
+    # figure out what the default axis limits are
+    ydiff = np.log10(ymax) - np.log10(ymin)
+    ystart = 10.**(np.log10(ymin) - 0.05*ydiff)
+    yend = 10.**(np.log10(ymax) + 0.05*ydiff)
+
+    # jupiter/earth radius ratio
+    radratio = 11.21
+
+    # set up the second axis with the proper scaling
+    fig.extra_y_ranges = {"jup": Range1d(start=ystart/radratio,
+                                         end=yend/radratio)}
+    fig.add_layout(LogAxis(y_range_name="jup"), 'right')
+
+    # add the first y-axis's label and use our custom log formatting for both
+    # axes
+    fig.yaxis.axis_label = 'Radius (Earth Radii)'
+    fig.yaxis.formatter = FuncTickFormatter(code=log_axis_labels())
+
+    # add the x-axis's label and use our custom log formatting
+    fig.xaxis.axis_label = 'Period (days)'
+    fig.xaxis.formatter = FuncTickFormatter(code=log_axis_labels())
+
+    # add the second y-axis's label
+    fig.right[0].axis_label = 'Radius (Jupiter Radii)'
+
+    # which order to place the legend labels
+    topleg = ['Kepler Confirmed', 'K2 Confirmed', 'TESS Confirmed']
+    bottomleg = ['Kepler Candidate', 'K2 Candidate', 'TESS Candidate']
+    vbottomleg = ['Other Confirmed']
+
+    # everything drawn for each mission, so clicking on it in the legend
+    # hides or shows its density grid along with its planets
+    layers = [[glyph] for glyph in glyphs]
+    for ii, cells in enumerate(grids):
+        layers[ii].append(cells)
+
+    # set up all the legend objects
+    items1 = [LegendItem(label=ii + f' ({counts[missions.index(ii)]})',
+                         renderers=layers[missions.index(ii)])
+              for ii in topleg]
+    items2 = [LegendItem(label=ii + f' ({counts[missions.index(ii)]})',
+                         renderers=layers[missions.index(ii)])
+              for ii in bottomleg]
+    items3 = [LegendItem(label=ii + f' ({counts[missions.index(ii)]})',
+                         renderers=layers[missions.index(ii)])
+              for ii in vbottomleg]
+
+    # create the two legends
+    for ii in np.arange(3):
+        if ii == 0:
+            items = items3
+        elif ii == 1:
+            items = items2
+        else:
+            items = items1
+        legend = Legend(items=items, location="center")
+
+        if ii == 2:
+            legend.title = 'Discovered by and Status'
+            legend.spacing = 10
+        else:
+            legend.spacing = 11
+
+        legend.location = (-70, 5)
+        legend.label_text_align = 'left'
+        legend.margin = 0
+
+        fig.add_layout(legend, 'above')
+
+    # overall figure title
+    fig.title.text = 'Transiting Planets and Planet Candidates'
+
+    # create the four lines of credit text in the two bottom corners
+    label_opts1 = dict(
+        x=-85, y=42,
+        x_units='screen', y_units='screen'
+    )
+
+    label_opts2 = dict(
+        x=-85, y=47,
+        x_units='screen', y_units='screen'
+    )
+
+    label_opts3 = dict(
+        x=612, y=79,
+        x_units='screen', y_units='screen', text_align='right',
+        text_font_size='9pt'
+    )
+
+    label_opts4 = dict(
+        x=612, y=83,
+        x_units='screen', y_units='screen', text_align='right',
+        text_font_size='9pt'
+    )
+
+    msg1 = 'By Exoplots'
+    # when did the data last get updated
+    modtimestr = get_update_time().strftime('%Y %b %d')
+    msg3 = 'Data: NASA Exoplanet Archive'
+    msg4 = 'and ExoFOP-TESS'
+
+    caption1 = Label(text=msg1, **label_opts1)
+    caption2 = Label(text=modtimestr, **label_opts2)
+    caption3 = Label(text=msg3, **label_opts3)
+    caption4 = Label(text=msg4, **label_opts4)
+
+    fig.add_layout(caption1, 'below')
+    fig.add_layout(caption2, 'below')
+    fig.add_layout(caption3, 'below')
+    fig.add_layout(caption4, 'below')
+
+    save_figure(fig, fullfile, embedfile, 'Period Radius Plot', theme,
+                optimize=True, derived={'jupradius': ('radius', radratio)})
+
+
+if __name__ == "__main__":
+    build(load_data(unified=True))
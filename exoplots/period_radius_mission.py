@@ -0,0 +1,185 @@
+import numpy as np
+from bokeh import plotting
+from bokeh.models import FuncTickFormatter, OpenURL, TapTool
+from bokeh.models import Label, Legend, LegendItem, LogAxis, Range1d
+from bokeh.themes import Theme
+
+from .utils import get_update_time, load_data, log_axis_labels
+from .utils import save_figure
+
+# what order to plot things and what the legend labels will say
+missions = ['Kepler', 'K2', 'TESS', 'Other']
+
+# markers and colors in the same order as the missions above
+markers = ['circle', 'square', 'triangle', 'diamond', 'inverted_triangle']
+# colorblind friendly palette from https://personal.sron.nl/~pault/
+# other ideas:
+# https://thenode.biologists.com/data-visualization-with-flying-colors/research/
+colors = ['#228833', '#ee6677', '#ccbb44', '#aa3377', '#4477aa',
+          '#aaaaaa', '#66ccee']
+
+# this works off of the unified table (see utils.unify), so the columns it
+# uses are registered there
+
+# output files
+embedfile = '_includes/period_radius_embed.html'
+fullfile = '_includes/period_radius.html'
+
+# what to display when hovering over a data point
+TOOLTIPS = [
+    ("Planet", "@planet"),
+    # only give the decimal and sig figs if needed
+    ("Period", "@period{0,0[.][0000]} days"),
+    ("Radius", "@radius{0,0[.][00]} Earth; @jupradius{0,0[.][0000]} Jup"),
+    ("Discovered by", "@discovery")
+]
+
+
+def build(df):
+    """
+    Create the period-radius figure of all confirmed transiting planets,
+    colored by discovery facility.
+
+    Parameters
+    ----------
+    df : DataFrame
+        All the planets and candidates in one table, as returned by
+        `load_data` with unified=True.
+
+    """
+    # get the exoplot theme
+    theme = Theme(filename="./exoplots_theme.yaml")
+
+    # create the figure
+    fig = plotting.figure(x_axis_type='log', y_axis_type='log',
+                          tooltips=TOOLTIPS)
+    # allow for something to happen when you click on data points
+    fig.add_tools(TapTool())
+
+    # need to store min and max radius values to create the second axis
+    ymin = 1
+    ymax = 1
+    # save the output plots to rearrange them in the legend
+    glyphs = []
+    counts = []
+
+    # only the confirmed transiting planets
+    usable = ((df['table'] == 'confirmed') & df['has_radius'] &
+              df['has_period'] & df['transits'])
+
+    for ii, imiss in enumerate(missions):
+        # select the appropriate set of planets for each mission
+        if imiss == 'Other':
+            good = usable & ~df['mission'].isin(missions)
+        else:
+            good = usable & (df['mission'] == imiss)
+
+        # make the alpha of large groups lower so they don't dominate so much
+        alpha = 1. - good.sum()/1000.
+        alpha = max(0.2, alpha)
+
+        # what the hover tooltip draws its values from
+        source = plotting.ColumnDataSource(data=dict(
+                planet=df['name'][good],
+                period=df['period'][good],
+                radius=df['radius_e'][good],
+                jupradius=df['radius_j'][good],
+                host=df['host'][good],
+                discovery=df['mission'][good],
+                url=df['url'][good]
+                ))
+        print(imiss, ': ', good.sum())
+        counts.append(f'{good.sum():,}')
+
+        # plot the planets
+        # nonselection stuff is needed to prevent planets in that category from
+        # disappearing when you click on a data point ("select" it)
+        glyph = fig.scatter('period', 'radius', color=colors[ii],
+                            source=source, size=8, alpha=alpha,
+                            marker=markers[ii],
+                            nonselection_alpha=alpha,
+                            nonselection_color=colors[ii])
+        glyphs.append(glyph)
+        # save the global min/max
+        ymin = min(ymin, source.data['radius'].min())
+        ymax = max(ymax, source.data['radius'].max())
+
+    # set up where to send people when they click on a planet
+    url = "@url"
+    taptool = fig.select(TapTool)
+    taptool.callback = OpenURL(url=url)
+
+    # figure out what the default axis limits are
+    ydiff = np.log10(ymax) - np.log10(ymin)
+    ystart = 10.**(np.log10(ymin) - 0.05*ydiff)
+    yend = 10.**(np.log10(ymax) + 0.05*ydiff)
+
+    # jupiter/earth radius ratio
+    radratio = 11.21
+
+    # set up the second axis with the proper scaling
+    fig.extra_y_ranges = {"jup": Range1d(start=ystart/radratio,
+                                         end=yend/radratio)}
+    fig.add_layout(LogAxis(y_range_name="jup"), 'right')
+
+    # add the first y-axis's label and use our custom log formatting for both
+    # axes
+    fig.yaxis.axis_label = 'Radius (Earth Radii)'
+    fig.yaxis.formatter = FuncTickFormatter(code=log_axis_labels(max_tick=5))
+
+    # add the x-axis's label and use our custom log formatting
+    fig.xaxis.axis_label = 'Period (days)'
+    fig.xaxis.formatter = FuncTickFormatter(code=log_axis_labels(max_tick=5))
+
+    # add the second y-axis's label
+    fig.right[0].axis_label = 'Radius (Jupiter Radii)'
+
+    # set up all the legend objects
+    items = [LegendItem(label=ii + f' ({counts[missions.index(ii)]})',
+                        renderers=[jj])
+             for ii, jj in zip(missions, glyphs)]
+    # create the legend
+    legend = Legend(items=items, location="center")
+    legend.title = 'Discovered by'
+    legend.spacing = 10
+    fig.add_layout(legend, 'above')
+
+    # overall figure title
+    fig.title.text = 'Confirmed Transiting Planets'
+
+    # create the three lines of credit text in the two bottom corners
+    label_opts1 = dict(
+        x=-68, y=42,
+        x_units='screen', y_units='screen'
+    )
+
+    label_opts2 = dict(
+        x=-68, y=47,
+        x_units='screen', y_units='screen'
+    )
+
+    label_opts3 = dict(
+        x=627, y=64,
+        x_units='screen', y_units='screen', text_align='right',
+        text_font_size='9pt'
+    )
+
+    msg1 = 'By Exoplots'
+    # when did the data last get updated
+    modtimestr = get_update_time().strftime('%Y %b %d')
+    msg3 = 'Data: NASA Exoplanet Archive'
+
+    caption1 = Label(text=msg1, **label_opts1)
+    caption2 = Label(text=modtimestr, **label_opts2)
+    caption3 = Label(text=msg3, **label_opts3)
+
+    fig.add_layout(caption1, 'below')
+    fig.add_layout(caption2, 'below')
+    fig.add_layout(caption3, 'below')
+
+    save_figure(fig, fullfile, embedfile, 'Period Radius Plot', theme,
+                optimize=True, derived={'jupradius': ('radius', radratio)})
+
+
+if __name__ == "__main__":
+    build(load_data(unified=True))
@@ -0,0 +1,552 @@
+from datetime import datetime
+
+import numpy as np
+from bokeh import plotting
+from bokeh.models import FuncTickFormatter, Label, NumeralTickFormatter
+from bokeh.themes import Theme
+
+from .ledger import discovery_years
+from .utils import get_update_time, log_axis_labels, save_figure
+
+# what order to plot things and what the legend labels will say
+methods = ['Other', 'Radial Velocity', 'Transit']
+
+# colorblind friendly palette from https://personal.sron.nl/~pault/
+# other ideas:
+# https://thenode.biologists.com/data-visualization-with-flying-colors/research/
+# colors = ['#228833', '#ee6677', '#ccbb44', '#aa3377', '#4477aa',
+#           '#aaaaaa', '#66ccee']
+
+colors = ['#ccbb44', '#ee6677', '#228833']
+
+# columns of the data tables used here (see columns.py)
+COLUMNS = {
+    'confirmed': ['pl_disc', 'pl_discmethod', 'pl_facility', 'year_disc'],
+    'koi': ['koi_disposition', 'year_disc'],
+    'k2': ['k2c_disp', 'k2c_recentflag', 'year_disc'],
+    'toi': ['disp', 'year_disc'],
+}
+
+# the other axes of the planet count cube (see count_cube)
+STATUSES = ['Confirmed', 'Candidate']
+MISSIONS = ['Kepler', 'K2', 'TESS', 'Other']
+YEAR_KINDS = ['confirmation', 'discovery']
+
+# output files
+embedfile_name = '_includes/per_year_{0}_embed.html'
+fullfile_name = '_includes/per_year_{0}.html'
+
+embedfilelog_name = '_includes/per_year_{0}_log_embed.html'
+fullfilelog_name = '_includes/per_year_{0}_log.html'
+
+embedfilecum_name = '_includes/per_year_{0}_cumul_embed.html'
+fullfilecum_name = '_includes/per_year_{0}_cumul.html'
+
+embedfilecumlog_name = '_includes/per_year_{0}_cumul_log_embed.html'
+fullfilecumlog_name = '_includes/per_year_{0}_cumul_log.html'
+
+# every version of the figure in the order they get made, named to match their
+# output files
+VARIANTS = ['confirmed', 'confirmed_cumul', 'candidate', 'candidate_cumul',
+            'confirmed_log', 'confirmed_cumul_log', 'candidate_log',
+            'candidate_cumul_log']
+
+fancytool0 = """
+    <div>
+        <span style="font-size: 12px; float:right;">@$name{0,0}</span>
+        <span style="font-size: 12px; color: #5caddd; float:right;">
+        @years $name:</span>          
+    </div>
+    <div>
+        <span style="font-size: 12px; float:right;">@total{0,0}</span>
+        <span style="font-size: 12px; color: #5caddd; float:right;">
+        @years Total:</span> 
+    </div>"""
+
+fancytool1 = """
+    <div>
+        <span style="font-size: 12px; float:right;">@$name{0,0}</span>
+        <span style="font-size: 12px; color: #5caddd; float:right;">
+        $name through @years:</span>          
+    </div>
+    <div>
+        <span style="font-size: 12px; float:right;">@total{0,0}</span>
+        <span style="font-size: 12px; color: #5caddd; float:right;">
+        Total through @years:</span> 
+    </div>"""
+
+
+def output_files(variant):
+    """
+    Get the output files for one version of the figure.
+
+    Parameters
+    ----------
+    variant : str
+        One of the `VARIANTS`.
+
+    Returns
+    -------
+    fullfile, embedfile : str
+        Where the full HTML page and the embeddable pieces are saved.
+
+    """
+    return (f'_includes/per_year_{variant}.html',
+            f'_includes/per_year_{variant}_embed.html')
+
+
+def count_cube(dfcon, dfkoi, dfk2, dftoi, first_year=None, last_year=None):
+    """
+    Count the planets and candidates by year, discovery method, status,
+    mission, and kind of year all at once.
+
+    Confirmed planets are counted both by the year they were confirmed and
+    by the year they were first discovered (e.g. as a KOI). Candidates only
+    have a discovery year, and are all counted as found by transit.
+
+    Parameters
+    ----------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        The data tables with discovery years as returned by
+        `get_discovery_year`.
+    first_year, last_year : int, optional
+        Make sure the years cover at least this range. By default they only
+        cover the years with planets.
+
+    Returns
+    -------
+    cube : ndarray
+        Number of planets, with shape (year, method, status, mission,
+        year kind) where the axes are in the order of `years`, `methods`,
+        `STATUSES`, `MISSIONS`, and `YEAR_KINDS`.
+    years : ndarray
+        The year of each entry along the first axis.
+
+    """
+    import pandas as pd
+
+    def codes(values, labels, other):
+        # index of each value in labels, with anything else as other
+        idx = pd.Categorical(values, categories=labels).codes.astype(int)
+        idx[idx < 0] = labels.index(other)
+        return idx
+
+    ncon = len(dfcon)
+    conmeth = codes(dfcon['pl_discmethod'], methods, 'Other')
+    conmiss = codes(dfcon['pl_facility'], MISSIONS, 'Other')
+
+    # confirmed planets by confirmation year and then discovery year
+    yrs = [dfcon['pl_disc'], dfcon['year_disc']]
+    meths = [conmeth, conmeth]
+    stats = [np.zeros(2 * ncon, dtype=int)]
+    miss = [conmiss, conmiss]
+    kinds = [np.zeros(ncon, dtype=int), np.ones(ncon, dtype=int)]
+
+    # then the candidates from each mission
+    toican = dftoi['disp'] == 'Candidate'
+    k2can = ((dfk2['k2c_disp'] == 'Candidate') &
+             dfk2['k2c_recentflag'].astype(bool))
+    koican = dfkoi['koi_disposition'] == 'Candidate'
+    for df, good, mission in [(dfkoi, koican, 'Kepler'), (dfk2, k2can, 'K2'),
+                              (dftoi, toican, 'TESS')]:
+        ncan = good.sum()
+        yrs.append(df['year_disc'][good])
+        meths.append(np.full(ncan, methods.index('Transit')))
+        stats.append(np.full(ncan, STATUSES.index('Candidate')))
+        miss.append(np.full(ncan, MISSIONS.index(mission)))
+        kinds.append(np.full(ncan, YEAR_KINDS.index('discovery')))
+
+    yrs = np.concatenate(yrs).astype(int)
+    y0 = yrs.min() if first_year is None else min(yrs.min(), first_year)
+    y1 = yrs.max() if last_year is None else max(yrs.max(), last_year)
+    years = np.arange(y0, y1 + 1)
+
+    shape = (years.size, len(methods), len(STATUSES), len(MISSIONS),
+             len(YEAR_KINDS))
+    flat = np.ravel_multi_index((yrs - y0, np.concatenate(meths),
+                                 np.concatenate(stats), np.concatenate(miss),
+                                 np.concatenate(kinds)), shape)
+    cube = np.bincount(flat, minlength=np.prod(shape)).reshape(shape)
+    return cube, years
+
+
+def build(dfcon, dfkoi, dfk2, dftoi, variants=None):
+    """
+    Create the confirmed and confirmed + candidate planets per year figures,
+    both per year and cumulative and on linear and log scales.
+
+    Parameters
+    ----------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        The data tables with discovery years as returned by
+        `get_discovery_year`.
+    variants : list of str, optional
+        Which of the `VARIANTS` to make. Default is all of them.
+
+    """
+    if variants is None:
+        variants = VARIANTS
+
+    # get the exoplot theme
+    theme = Theme(filename="./exoplots_theme.yaml")
+    # XXX: can't figure out why the theme value overrides anything we set below
+    #   but only for this
+    theme._json['attrs']['Legend']['orientation'] = 'vertical'
+
+    years = range(dfcon['pl_disc'].min(), datetime.now().year+1)
+
+    cube, cubeyears = count_cube(dfcon, dfkoi, dfk2, dftoi,
+                                 first_year=years[0], last_year=years[-1])
+    inyears = (cubeyears >= years[0]) & (cubeyears <= years[-1])
+    iconf = STATUSES.index('Confirmed')
+    iconyear = YEAR_KINDS.index('confirmation')
+    idiscyear = YEAR_KINDS.index('discovery')
+
+    # confirmed planets by year of confirmation and all planets and
+    # candidates by year of discovery, for each method
+    concounts = cube[:, :, iconf, :, iconyear].sum(axis=-1)
+    pccounts = cube[:, :, :, :, idiscyear].sum(axis=(-2, -1))
+
+    base = [0.01] * len(years)
+    condata = {'years': years, 'base': base}
+    concumul = {'years': years, 'base': base}
+    pcdata = {'years': years, 'base': base}
+    pccumul = {'years': years, 'base': base}
+    conleglab = []
+    pcleglab = []
+    for ii, imeth in enumerate(methods):
+        condata[imeth] = concounts[inyears, ii].tolist()
+        concumul[imeth] = np.cumsum(concounts[inyears, ii]).tolist()
+        conleglab.append(imeth + f' ({concounts[:, ii].sum():,})')
+
+        pcdata[imeth] = pccounts[inyears, ii].tolist()
+        pccumul[imeth] = np.cumsum(pccounts[inyears, ii]).tolist()
+        pcleglab.append(imeth + f' ({pccounts[:, ii].sum():,})')
+
+    contots = concounts[inyears].sum(axis=1)
+    concumtots = np.cumsum(contots)
+    condata['total'] = contots
+    concumul['total'] = concumtots
+
+    pctots = pccounts[inyears].sum(axis=1)
+    pccumtots = np.cumsum(pctots)
+    pcdata['total'] = pctots
+    pccumul['total'] = pccumtots
+
+    # get the exponential growth bit
+    cyear = get_update_time().year
+    # how many days is this year
+    fullyear = datetime(cyear + 1, 1, 1) - datetime(cyear, 1, 1)
+    # extrapolate this year's total through the full year
+    upscale = fullyear / (get_update_time() - datetime(cyear, 1, 1))
+    conscaled = concumtots * 1
+    conscaled[-1] = conscaled[-2] + upscale * (conscaled[-1] - conscaled[-2])
+    pcscaled = pccumtots * 1
+    pcscaled[-1] = pcscaled[-2] + upscale * (pcscaled[-1] - pcscaled[-2])
+    # use a weighted exponential growth fit
+    # see https://mathworld.wolfram.com/LeastSquaresFittingExponential.html
+    conexp = np.polyfit(np.arange(conscaled.size), np.log(conscaled),
+                        1, w=np.log(conscaled))
+    conpreds = np.exp(np.polyval(conexp, np.arange(conscaled.size)))
+    contdouble = np.log(2) / conexp[0]
+    concumul['Predicted'] = conpreds
+
+    pcexp = np.polyfit(np.arange(pcscaled.size), np.log(pcscaled),
+                       1, w=np.log(pcscaled))
+    pcpreds = np.exp(np.polyval(pcexp, np.arange(pcscaled.size)))
+    pctdouble = np.log(2) / pcexp[0]
+    pccumul['Predicted'] = pcpreds
+
+    # make the per year and then cumulative plots
+    for xx in np.arange(4):
+        if VARIANTS[xx] not in variants:
+            continue
+        # set up the full output file and create the figure
+        if (xx % 2) == 0:
+            if xx == 0:
+                txt = 'confirmed'
+                tots = contots
+                data = condata
+                leglab = conleglab
+                cumtots = concumtots
+            else:
+                txt = 'candidate'
+                tots = pctots
+                data = pcdata
+                leglab = pcleglab
+                cumtots = pccumtots
+            fullfile = fullfile_name.format(txt)
+            embedfile = embedfile_name.format(txt)
+            title = 'Planets Per Year'
+            # '@years $name: @$name; Total: @total'
+            fig = plotting.figure(tooltips=fancytool0,
+                                  y_range=(0, tots.max()*1.05))
+            fig.vbar_stack(methods, x='years', width=0.9, color=colors,
+                           source=data, legend_label=leglab, line_width=0)
+        else:
+            if xx == 1:
+                txt = 'confirmed'
+                tots = contots
+                data = condata
+                leglab = conleglab
+                cumtots = concumtots
+                cumul = concumul
+                tdouble = contdouble
+            else:
+                txt = 'candidate'
+                tots = pctots
+                data = pcdata
+                leglab = pcleglab
+                cumtots = pccumtots
+                cumul = pccumul
+                tdouble = pctdouble
+            fullfile = fullfilecum_name.format(txt)
+            embedfile = embedfilecum_name.format(txt)
+            title = 'Cumulative Planets'
+            fig = plotting.figure(tooltips=fancytool1,
+                                  y_range=(0, cumtots.max()*1.05))
+            # plot the exponential growth
+            fig.line('years', 'Predicted', source=cumul, line_width=5,
+                     line_color='black', name='Predicted',
+                     legend_label=f'Doubling Time: {tdouble:.2f} years')
+            fig.vbar_stack(methods, x='years', width=0.9, color=colors,
+                           source=cumul, legend_label=leglab, line_width=0)
+
+        # add the first y-axis's label and use our custom log formatting
+        # for both axes
+        fig.yaxis.axis_label = 'Number'
+        fig.yaxis.formatter = NumeralTickFormatter(format='0,0')
+
+        # add the x-axis's label and use our custom log formatting
+        if xx < 2:
+            fig.xaxis.axis_label = 'Year of Confirmation'
+        else:
+            fig.xaxis.axis_label = 'Year of Discovery'
+
+        # create the legend
+        legend = fig.legend
+        legend.location = 'top_left'
+        # legend.orientation = "vertical"
+        legend.title = 'Discovered via'
+        # legend.spacing = 10
+        # legend.margin = 8
+        legend[0].items = legend[0].items[::-1]
+
+        # overall figure title
+        if xx == 0:
+            fig.title.text = f'Confirmed Planets Per Year ({cumtots[-1]:,})'
+        elif xx == 1:
+            fig.title.text = f'Cumulative Confirmed Planets ({cumtots[-1]:,})'
+        elif xx == 2:
+            paren = f'({cumtots[-1]:,})'
+            fig.title.text = f'Confirmed + Candidate Planets Per Year ' + paren
+        else:
+            paren = f'({cumtots[-1]:,})'
+            fig.title.text = ('Cumulative Confirmed + Candidate Planets ' +
+                              paren)
+            fig.title.align = 'right'
+        fig.title.text_font_size = '20pt'
+
+        # create the three lines of credit text in the two bottom corners
+        label_opts1 = dict(
+            x=-84, y=42,
+            x_units='screen', y_units='screen'
+        )
+
+        label_opts2 = dict(
+            x=-84, y=47,
+            x_units='screen', y_units='screen'
+        )
+
+        if xx > 1:
+            yup = 80
+        else:
+            yup = 70
+
+        label_opts3 = dict(
+            x=612, y=yup,
+            x_units='screen', y_units='screen', text_align='right',
+            text_font_size='9pt'
+        )
+
+        label_opts4 = dict(
+            x=612, y=yup+4,
+            x_units='screen', y_units='screen', text_align='right',
+            text_font_size='9pt'
+        )
+
+        msg1 = 'By Exoplots'
+        # when did the data last get updated
+        modtimestr = get_update_time().strftime('%Y %b %d')
+        msg3 = 'Data: NASA Exoplanet Archive'
+        msg4 = 'and ExoFOP-TESS'
+
+        caption1 = Label(text=msg1, **label_opts1)
+        caption2 = Label(text=modtimestr, **label_opts2)
+        caption3 = Label(text=msg3, **label_opts3)
+        caption4 = Label(text=msg4, **label_opts4)
+
+        fig.add_layout(caption1, 'below')
+        fig.add_layout(caption2, 'below')
+        fig.add_layout(caption3, 'below')
+        if xx > 1:
+            fig.add_layout(caption4, 'below')
+
+        save_figure(fig, fullfile, embedfile, title, theme)
+
+    # now do the same thing but on log scale
+
+    logmethods = ['base'] + methods
+    logcolors = ['#000000'] + colors
+    conleglab.insert(0, '')
+    pcleglab.insert(0, '')
+
+    # make the per year and then cumulative plots
+    for xx in np.arange(4):
+        if VARIANTS[xx + 4] not in variants:
+            continue
+        ymin = 0.8
+        # set up the full output file and create the figure
+        if (xx % 2) == 0:
+            if xx == 0:
+                txt = 'confirmed'
+                tots = contots
+                data = condata
+                leglab = conleglab
+                cumtots = concumtots
+            else:
+                txt = 'candidate'
+                tots = pctots
+                data = pcdata
+                leglab = pcleglab
+                cumtots = pccumtots
+            ymax = 10.**(np.log10(tots.max()) +
+                         0.05*(np.log10(tots.max()) - np.log10(ymin)))
+            fullfile = fullfilelog_name.format(txt)
+            embedfile = embedfilelog_name.format(txt)
+            fig2 = plotting.figure(tooltips=fancytool0,
+                                   y_range=(ymin, ymax), y_axis_type='log')
+            fig2.vbar_stack(logmethods, x='years', width=0.9, color=logcolors,
+                            source=data, legend_label=leglab, line_width=0)
+        else:
+            if xx == 1:
+                txt = 'confirmed'
+                tots = contots
+                data = condata
+                leglab = conleglab
+                cumtots = concumtots
+                cumul = concumul
+                tdouble = contdouble
+            else:
+                txt = 'candidate'
+                tots = pctots
+                data = pcdata
+                leglab = pcleglab
+                cumtots = pccumtots
+                cumul = pccumul
+                tdouble = pctdouble
+            ymax = 10.**(np.log10(cumtots.max()) +
+                         0.065*(np.log10(cumtots.max()) - np.log10(ymin)))
+            fullfile = fullfilecumlog_name.format(txt)
+            embedfile = embedfilecumlog_name.format(txt)
+            fig2 = plotting.figure(tooltips=fancytool1,
+                                   y_range=(ymin, ymax), y_axis_type='log')
+            # plot the exponential growth
+            fig2.line('years', 'Predicted', source=cumul, line_width=5,
+                      line_color='black', name='Predicted',
+                      legend_label=f'Doubling Time: {tdouble:.2f} years')
+            fig2.vbar_stack(logmethods, x='years', width=0.9, color=logcolors,
+                            source=cumul, legend_label=leglab, line_width=0)
+
+        # add the first y-axis's label and use our custom log formatting
+        # for both axes
+        fig2.yaxis.axis_label = 'Number'
+        fig2.yaxis.formatter = FuncTickFormatter(
+            code=log_axis_labels(max_tick=5.1))
+
+        # add the x-axis's label and use our custom log formatting
+        if xx < 2:
+            fig2.xaxis.axis_label = 'Year of Confirmation'
+        else:
+            fig2.xaxis.axis_label = 'Year of Discovery'
+
+        # create the legend
+        legend = fig2.legend
+        legend.location = 'top_left'
+        # legend.orientation = "vertical"
+        legend.title = 'Discovered via'
+        # legend.spacing = 10
+        # legend.margin = 8
+
+        # overall figure title
+        if xx == 0:
+            fig2.title.text = f'Confirmed Planets Per Year ({cumtots[-1]:,})'
+        elif xx == 1:
+            fig2.title.text = f'Cumulative Confirmed Planets ({cumtots[-1]:,})'
+        elif xx == 2:
+            paren = f'({cumtots[-1]:,})'
+            fig2.title.text = ('Confirmed + Candidate Planets Per Year ' +
+                               paren)
+        else:
+            paren = f'({cumtots[-1]:,})'
+            fig2.title.text = ('Cumulative Confirmed + Candidate Planets ' +
+                               paren)
+            fig2.title.align = 'right'
+        fig2.title.text_font_size = '20pt'
+
+        if (xx % 2) == 1:
+            legend[0].items.pop(1)
+        else:
+            legend[0].items.pop(0)
+        legend[0].items = legend[0].items[::-1]
+
+        # create the three lines of credit text in the two bottom corners
+        label_opts1 = dict(
+            x=-84, y=42,
+            x_units='screen', y_units='screen'
+        )
+
+        label_opts2 = dict(
+            x=-84, y=47,
+            x_units='screen', y_units='screen'
+        )
+
+        if xx > 1:
+            yup = 80
+        else:
+            yup = 70
+
+        label_opts3 = dict(
+            x=612, y=yup,
+            x_units='screen', y_units='screen', text_align='right',
+            text_font_size='9pt'
+        )
+
+        label_opts4 = dict(
+            x=612, y=yup+4,
+            x_units='screen', y_units='screen', text_align='right',
+            text_font_size='9pt'
+        )
+
+        msg1 = 'By Exoplots'
+        # when did the data last get updated
+        modtimestr = get_update_time().strftime('%Y %b %d')
+        msg3 = 'Data: NASA Exoplanet Archive'
+        msg4 = 'and ExoFOP-TESS'
+
+        caption1 = Label(text=msg1, **label_opts1)
+        caption2 = Label(text=modtimestr, **label_opts2)
+        caption3 = Label(text=msg3, **label_opts3)
+        caption4 = Label(text=msg4, **label_opts4)
+
+        fig2.add_layout(caption1, 'below')
+        fig2.add_layout(caption2, 'below')
+        fig2.add_layout(caption3, 'below')
+        if xx > 1:
+            fig2.add_layout(caption4, 'below')
+
+        save_figure(fig2, fullfile, embedfile, 'Planets Per Year Log', theme)
+
+
+if __name__ == "__main__":
+    build(*discovery_years())
@@ -0,0 +1,275 @@
+"""
+Optional instrumentation of each stage of the build, so that when the nightly
+run gets slower we can tell which stage is responsible.
+
+Stages are marked with `stage`, either as a context manager or as a
+decorator, and can be nested. Nothing is recorded unless profiling has been
+turned on with `start`, which the command line does when given --profile or
+when the EXOPLOTS_PROFILE environment variable is set. Every stage then
+records how long it took and, depending on the level, the peak and net memory
+allocated while it ran and a cProfile dump. `finish` saves the records to a
+new JSON file in `METRICS` for every run so they can be trended over time.
+
+Tracking memory with tracemalloc slows everything down quite a bit, so only
+compare stage times between runs at the same level.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# environment variable that turns profiling on. set it to one of the `LEVELS`
+# (any other value besides 0 means 'memory')
+ENVIRONMENT = 'EXOPLOTS_PROFILE'
+
+# how much to record about each stage. each level includes the ones before it
+LEVELS = ['time', 'memory', 'cprofile']
+
+# one file of stage metrics per run. {command} and {time} are filled in
+METRICS = 'data/metrics/{command}-{time}.json'
+
+# where the cProfile dumps go. they're big and only for looking at by hand,
+# so they aren't committed
+PROFILES = 'profiles'
+
+# the run being profiled, or None if profiling is off
+_run = None
+
+
+def level(flag=None):
+    """
+    Figure out how much profiling was asked for.
+
+    Parameters
+    ----------
+    flag : str, optional
+        One of the `LEVELS` from the command line. Overrides `ENVIRONMENT`.
+
+    Returns
+    -------
+    str or None
+        One of the `LEVELS`, or None if profiling is off.
+
+    """
+    if flag is None:
+        flag = os.environ.get(ENVIRONMENT, '').strip().lower()
+        if flag in ('', '0'):
+            return None
+    return flag if flag in LEVELS else 'memory'
+
+
+def start(command, lvl='memory', stamp=None):
+    """
+    Start recording every `stage`.
+
+    Parameters
+    ----------
+    command : str or None
+        What is being run, e.g. 'build'. Used to name the metrics file.
+    lvl : str, optional
+        One of the `LEVELS`. Default 'memory'.
+    stamp : str, optional
+        When the run started, to label the cProfile dumps with. Worker
+        processes get the one from the main process. Defaults to now.
+
+    """
+    import tracemalloc
+
+    global _run
+    if stamp is None:
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+    memory = LEVELS.index(lvl) >= LEVELS.index('memory')
+    _run = {'command': command, 'level': lvl, 'stamp': stamp,
+            'start': time.perf_counter(), 'stages': [], 'stack': [],
+            'profiler': None,
+            # leave tracemalloc alone if someone else started it
+            'tracemalloc': memory and not tracemalloc.is_tracing()}
+    if _run['tracemalloc']:
+        tracemalloc.start()
+
+
+def settings():
+    """
+    What worker processes need to profile the same way as this one.
+
+    Returns
+    -------
+    tuple or None
+        The level and stamp to pass to `start`, or None if profiling is off.
+
+    """
+    if _run is None:
+        return None
+    return _run['level'], _run['stamp']
+
+
+def _memory():
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()
+
+
+def _reset_peak():
+    # only Python 3.9+ can measure the peak of each stage separately
+    import tracemalloc
+
+    if not hasattr(tracemalloc, 'reset_peak'):
+        return False
+    tracemalloc.reset_peak()
+    return True
+
+
+@contextmanager
+def stage(name):
+    """
+    Mark a stage of the build to be recorded if profiling is on.
+
+    Nested stages are named after the stages they're in, e.g.
+    'load data/parse toi'. Use as a context manager or a decorator.
+
+    Parameters
+    ----------
+    name : str
+
+    """
+    if _run is None:
+        yield
+        return
+
+    stack = _run['stack']
+    parent = stack[-1] if stack else None
+    record = {'stage': f'{parent["record"]["stage"]}/{name}' if parent else
+              name}
+    _run['stages'].append(record)
+
+    frame = {'record': record, 'memory': _memory(), 'peak': None,
+             'profiler': None}
+    if frame['memory'] is not None:
+        current, peak = frame['memory']
+        if parent is not None and parent['peak'] is not None:
+            parent['peak'] = max(parent['peak'], peak)
+        if _reset_peak():
+            frame['peak'] = current
+    if _run['level'] == 'cprofile' and _run['profiler'] is None:
+        import cProfile
+
+        frame['profiler'] = _run['profiler'] = cProfile.Profile()
+    stack.append(frame)
+
+    begin = time.perf_counter()
+    if frame['profiler'] is not None:
+        frame['profiler'].enable()
+    try:
+        yield
+    except BaseException:
+        record['failed'] = True
+        raise
+    finally:
+        if frame['profiler'] is not None:
+            frame['profiler'].disable()
+        record['seconds'] = round(time.perf_counter() - begin, 4)
+        stack.pop()
+        _finish_stage(frame, parent)
+
+
+def _finish_stage(frame, parent):
+    record = frame['record']
+    if frame['memory'] is not None:
+        current, peak = _memory()
+        if frame['peak'] is not None:
+            frame['peak'] = max(frame['peak'], peak)
+            if parent is not None and parent['peak'] is not None:
+                parent['peak'] = max(parent['peak'], frame['peak'])
+        elif peak > frame['memory'][1]:
+            # a new high for the whole run must have been during this stage
+            frame['peak'] = peak
+        if frame['peak'] is not None:
+            record['peak_mb'] = round(frame['peak'] / 2**20, 1)
+        record['net_mb'] = round((current - frame['memory'][0]) / 2**20, 1)
+
+    if frame['profiler'] is not None:
+        _run['profiler'] = None
+        os.makedirs(PROFILES, exist_ok=True)
+        slug = ''.join(ii if ii.isalnum() else '_' for ii in record['stage'])
+        record['profile'] = os.path.join(PROFILES,
+                                         f'{_run["stamp"]}-{slug}.prof')
+        frame['profiler'].dump_stats(record['profile'])
+
+
+def collect():
+    """
+    Hand over everything recorded so far, e.g. to send from a worker process
+    back to the main one.
+
+    Returns
+    -------
+    list of dict
+        The stages recorded since the last call.
+
+    """
+    if _run is None:
+        return []
+    stages = _run['stages']
+    _run['stages'] = []
+    return stages
+
+
+def extend(stages):
+    """
+    Add stages recorded elsewhere (see `collect`) to this run.
+
+    Parameters
+    ----------
+    stages : list of dict
+
+    """
+    if _run is not None:
+        _run['stages'].extend(stages)
+
+
+def finish():
+    """
+    Stop profiling, print every stage, and save them to `METRICS`.
+
+    Returns
+    -------
+    str or None
+        The metrics file, or None if profiling was off.
+
+    """
+    import platform
+    import tracemalloc
+    from datetime import datetime
+
+    global _run
+    if _run is None:
+        return None
+    run, _run = _run, None
+    if run['tracemalloc']:
+        tracemalloc.stop()
+
+    for record in run['stages']:
+        depth = record['stage'].count('/')
+        name = record['stage'].rsplit('/', 1)[-1]
+        line = f'{"  " * depth}{name:<{40 - 2 * depth}} ' \
+               f'{record.get("seconds", 0):8.3f} s'
+        if 'peak_mb' in record:
+            line += f' {record["peak_mb"]:9.1f} MB peak'
+        print(line)
+
+    if run['command'] is None:
+        return None
+    metrics = {'command': run['command'], 'level': run['level'],
+               'date': datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(),
+               'seconds': round(time.perf_counter() - run['start'], 4),
+               'stages': run['stages']}
+    outfile = METRICS.format(command=run['command'], time=run['stamp'])
+    os.makedirs(os.path.dirname(outfile), exist_ok=True)
+    with open(outfile, 'w') as ff:
+        json.dump(metrics, ff, indent=1)
+        ff.write('\n')
+    print(f'Saved the stage metrics to {outfile}')
+    return outfile
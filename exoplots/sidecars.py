@@ -0,0 +1,176 @@
+"""
+Write the data behind each embedded figure to its own file instead of
+inlining it in the page.
+
+With sidecars on, once a figure's standalone page is saved every data source
+in the figure is written to a JSON file in `SIDECARS` named after a hash of
+its contents, and swapped for one that loads that file when the page does.
+The embedded figures then only hold the layout, and since the same data
+(e.g. the per year counts shared by the linear and log plots) always ends up
+in the same file, browsers only download and cache it once for every page
+and figure that uses it.
+
+The files are loaded relative to the site's base URL, which Jekyll fills in
+when it includes the embedded figures in our pages.
+"""
+import os
+import re
+
+# where the data files go
+SIDECARS = 'assets/data'
+
+# how the embedded figures find them
+URL = '{{ site.baseurl }}/' + SIDECARS
+
+# turns a data file back into the same columns bokeh would have had inline
+DECODE = """
+const serialization = Bokeh.require('core/util/serialization');
+const data = {};
+for (const name in cb_data.response) {
+    const column = cb_data.response[name];
+    data[name] = serialization.is_NDArray_ref(column) ?
+        serialization.decode_NDArray(column, new Map()) : column;
+}
+return data;
+"""
+
+# whether save_figure should write sidecars (see `enable`)
+_enabled = False
+
+
+def enable(on=True):
+    """
+    Turn writing sidecars for the figures made in this process on or off.
+
+    Parameters
+    ----------
+    on : bool, optional
+        Default True.
+
+    """
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    """
+    Whether sidecars are on.
+
+    Returns
+    -------
+    bool
+
+    """
+    return _enabled
+
+
+def write_sidecar(data):
+    """
+    Save the columns of a data source to a file named after its contents.
+
+    Parameters
+    ----------
+    data : dict
+        The `data` of a ColumnDataSource.
+
+    Returns
+    -------
+    str
+        Where the embedded figures will find the file.
+
+    """
+    import hashlib
+    import json
+
+    from bokeh.util.serialization import transform_column_source_data
+
+    from .utils import write_if_changed
+
+    # the same encoding bokeh uses for data inlined in the page
+    text = json.dumps(transform_column_source_data(data), sort_keys=True,
+                      separators=(',', ':'))
+    name = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16] + '.json'
+    os.makedirs(SIDECARS, exist_ok=True)
+    write_if_changed(os.path.join(SIDECARS, name), text)
+    return f'{URL}/{name}'
+
+
+def _replace(fig, old, new):
+    # point everything in the figure that uses one model at another instead.
+    # go through them in a set order, since looking at some properties
+    # creates new models (see utils.stable_ids)
+    for model in sorted(fig.references(), key=lambda ii: ii.id):
+        for attr in sorted(model.properties_with_refs()):
+            value = getattr(model, attr)
+            if value is old:
+                setattr(model, attr, new)
+            elif isinstance(value, list) and any(ii is old for ii in value):
+                setattr(model, attr, [new if ii is old else ii
+                                      for ii in value])
+            elif (isinstance(value, dict) and
+                  any(ii is old for ii in value.values())):
+                setattr(model, attr, {key: new if ii is old else ii
+                                      for key, ii in value.items()})
+
+
+def externalize(fig):
+    """
+    Move the data of every data source in a figure out to a sidecar.
+
+    Each ColumnDataSource is replaced by an AjaxDataSource with the same
+    (empty) columns that loads the data from its sidecar once.
+
+    Parameters
+    ----------
+    fig : bokeh.model.Model
+        The figure (or layout). Changed in place.
+
+    Returns
+    -------
+    list of str
+        Where the embedded figure finds each sidecar.
+
+    """
+    from bokeh.models import AjaxDataSource, ColumnDataSource, CustomJS
+
+    adapter = CustomJS(code=DECODE)
+    urls = []
+    sources = [ii for ii in fig.references() if type(ii) is ColumnDataSource]
+    for source in sorted(sources, key=lambda ii: ii.id):
+        urls.append(write_sidecar(source.data))
+        web = AjaxDataSource(data={col: [] for col in source.data},
+                             data_url=urls[-1], method='GET',
+                             adapter=adapter)
+        _replace(fig, source, web)
+    return urls
+
+
+def prune(files):
+    """
+    Delete every sidecar none of the given files use anymore.
+
+    Parameters
+    ----------
+    files : list of str
+        Every output file that could use a sidecar.
+
+    Returns
+    -------
+    list of str
+        The deleted sidecars.
+
+    """
+    used = set()
+    for ifile in files:
+        if os.path.exists(ifile):
+            with open(ifile, 'r') as ff:
+                used.update(re.findall(re.escape(SIDECARS) +
+                                       r'/([0-9a-f]{16}\.json)', ff.read()))
+
+    removed = []
+    if os.path.isdir(SIDECARS):
+        for name in sorted(os.listdir(SIDECARS)):
+            if name.endswith('.json') and name not in used:
+                removed.append(os.path.join(SIDECARS, name))
+                os.remove(removed[-1])
+    return removed
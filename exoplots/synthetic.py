@@ -0,0 +1,398 @@
+"""
+Make up data tables shaped like the ones we download from NExSci and
+ExoFOP-TESS, at any multiple of their current sizes.
+
+The tables only have the columns we download (see columns.py), and their
+values are random but look like the real thing where it matters: KOIs are in
+the Kepler field, K2 candidates along the ecliptic, and TOIs all over the sky.
+Every confirmed KOI, K2 candidate, and TOI has an entry in the confirmed
+planets table at the same position and period, so the tables can be matched
+up and checked just like the real ones. This is what the benchmarks (see
+benchmark.py) run on, so they don't need the network.
+"""
+import os
+
+import numpy as np
+
+# about how many entries are in each table as of late 2020
+SIZES = {'confirmed': 4300, 'koi': 9564, 'k2': 2400, 'toi': 2400}
+
+# center (degrees) and radius of the Kepler field
+KEPLER_FIELD = (290.67, 44.5, 8.)
+
+# when the data tables are said to have been updated
+UPDATE_TIME = '2020-11-05 01:12:13.123456'
+
+# discovery methods of the confirmed planets not from Kepler, K2, or TESS
+# and how common each is
+METHODS = {'Radial Velocity': 0.70, 'Transit': 0.10, 'Microlensing': 0.08,
+           'Imaging': 0.05, 'Transit Timing Variations': 0.03,
+           'Eclipse Timing Variations': 0.02,
+           'Orbital Brightness Modulation': 0.01, 'Pulsar Timing': 0.01}
+
+
+def _names(fmt, *values):
+    # format many numbers into strings at once
+    out = np.char.mod(fmt[0], values[0])
+    for ifmt, ival in zip(fmt[1:], values[1:]):
+        out = np.char.add(out, np.char.mod(ifmt, ival))
+    return out.astype(object)
+
+
+def _sky(rng, size):
+    # positions spread evenly over the whole sky
+    ra = rng.uniform(0, 360, size)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, size)))
+    return ra, dec
+
+
+def _periods(rng, star, planet, lo, hi):
+    # planets of the same star are spaced apart in period like real ones,
+    # so they never get mistaken for each other
+    base = 10**rng.uniform(lo, hi, star.max() + 1)
+    return (base[star] * 1.7**(planet - 1) *
+            rng.uniform(1, 1.2, star.size))
+
+
+def _sexagesimal(values, hours=False):
+    # degrees to dd:mm:ss.ss strings, the way ExoFOP lists them
+    if hours:
+        values = values / 15
+    sign = np.where(values < 0, '-', '' if hours else '+')
+    values = np.abs(values)
+    whole = np.floor(values)
+    minutes = np.floor((values - whole) * 60)
+    seconds = np.round(((values - whole) * 60 - minutes) * 60, 2)
+    # don't let the seconds round up to 60
+    seconds = np.minimum(seconds, 59.99)
+    return np.char.add(sign, _names(['%02d', ':%02d', ':%05.2f'], whole,
+                                    minutes, seconds).astype(str))
+
+
+def _confirmed(rng, name, host, ra, dec, period, facility, years):
+    import pandas as pd
+
+    size = len(name)
+    rade = 10**rng.uniform(-0.3, 1.3, size)
+    return pd.DataFrame({
+        'pl_name': name, 'pl_hostname': host, 'ra': ra, 'dec': dec,
+        'pl_orbper': period, 'pl_facility': facility,
+        'pl_discmethod': 'Transit',
+        'pl_disc': rng.integers(years[0], years[1] + 1, size),
+        'pl_tranflag': 1, 'pl_rade': rade, 'pl_radj': rade / 11.21,
+        'pl_bmasse': np.nan, 'pl_bmassj': np.nan})
+
+
+def make_koi(rng, size):
+    """
+    Make up the KOI table.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+    size : int
+        Number of KOIs.
+
+    Returns
+    -------
+    koi : DataFrame
+        The KOI table.
+    confirmed : DataFrame
+        Entries for the confirmed planets table of the confirmed KOIs.
+
+    """
+    import pandas as pd
+
+    # up to 10 KOIs per star, with the planets of a star all in one place
+    num = np.arange(size)
+    star = num // 10 + 1
+    planet = num % 10 + 1
+    cra, cdec, radius = KEPLER_FIELD
+    nstar = star[-1]
+    rad = radius * np.sqrt(rng.uniform(0, 1, nstar))
+    ang = rng.uniform(0, 2 * np.pi, nstar)
+    sdec = cdec + rad * np.sin(ang)
+    sra = cra + rad * np.cos(ang) / np.cos(np.radians(sdec))
+
+    disp = rng.choice(['CONFIRMED', 'CANDIDATE', 'FALSE POSITIVE'], size,
+                      p=[0.25, 0.25, 0.5])
+    prad = 10**rng.uniform(-0.3, 1.3, size)
+    prad[rng.random(size) < 0.05] = np.nan
+    koi = pd.DataFrame({
+        'kepid': 1000000 + star,
+        'kepoi_name': _names(['K%05d', '.%02d'], star, planet),
+        'koi_disposition': disp,
+        'ra': sra[star - 1], 'dec': sdec[star - 1],
+        'koi_period': _periods(rng, star, planet, -0.3, 1.5),
+        'koi_prad': prad,
+    })
+
+    con = koi[koi['koi_disposition'] == 'CONFIRMED']
+    letters = np.array(list('bcdefghijk'))
+    confirmed = _confirmed(
+        rng, _names(['Kepler-%d ', '%s'], star[con.index],
+                    letters[planet[con.index] - 1]),
+        _names(['Kepler-%d'], star[con.index]), con['ra'].to_numpy(),
+        con['dec'].to_numpy(), con['koi_period'].to_numpy(), 'Kepler',
+        (2010, 2020))
+    return koi, confirmed
+
+
+def make_k2(rng, size):
+    """
+    Make up the K2 candidates table.
+
+    Some candidates are listed more than once, as they are by NExSci, with
+    only the latest one flagged as the most recent.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+    size : int
+        Number of rows in the table.
+
+    Returns
+    -------
+    k2 : DataFrame
+        The K2 candidates table.
+    confirmed : DataFrame
+        Entries for the confirmed planets table of the confirmed candidates.
+
+    """
+    import pandas as pd
+
+    ncand = max(1, int(size * 0.75))
+    # up to 3 candidates per star
+    num = np.arange(ncand)
+    star = 201000000 + num // 3 * 7
+    planet = num % 3 + 1
+    sra = rng.uniform(0, 360, ncand)
+    sdec = (-23.44 * np.sin(np.radians(sra)) +
+            rng.normal(0, 3, ncand))[num // 3 * 3]
+    sra = sra[num // 3 * 3]
+    period = _periods(rng, num // 3, planet, -0.3, 1.2)
+    disp = rng.choice(['CONFIRMED', 'CANDIDATE', 'FALSE POSITIVE'], ncand,
+                      p=[0.3, 0.6, 0.1])
+
+    # which candidate each row is
+    icand = np.sort(np.concatenate([num, rng.integers(0, ncand,
+                                                      size - ncand)]))
+    recent = np.append(icand[1:] != icand[:-1], True)
+    years = rng.integers(2015, 2021, size)
+    rade = 10**rng.uniform(-0.3, 1.3, size)
+    radj = rade / 11.21
+    rade[rng.random(size) < 0.1] = np.nan
+    radj[rng.random(size) < 0.1] = np.nan
+
+    name = _names(['EPIC %d'], star)
+    candname = _names(['EPIC %d', '.%02d'], star, planet)
+    plname = np.where(disp == 'CONFIRMED',
+                      _names(['K2-%d ', '%s'], num + 1,
+                             np.array(list('bcd'))[planet - 1]), np.nan)
+    k2 = pd.DataFrame({
+        'epic_name': name[icand], 'epic_candname': candname[icand],
+        'pl_name': plname[icand], 'k2c_disp': disp[icand],
+        'k2c_recentflag': recent.astype(int),
+        'k2c_reflink': _names(['<a refstr=AUTHOR_ET_AL__%d href=https://ui.'
+                               'adsabs.harvard.edu/abs/x target=ref>Author '
+                               'et al. ', '%d</a>'], years, years),
+        'ra': sra[icand], 'dec': sdec[icand], 'pl_orbper': period[icand],
+        'pl_rade': rade, 'pl_radj': radj,
+    })
+
+    con = disp == 'CONFIRMED'
+    confirmed = _confirmed(rng, plname[con], name[con], sra[con], sdec[con],
+                           period[con], 'K2', (2015, 2020))
+    return k2, confirmed
+
+
+def make_toi(rng, size):
+    """
+    Make up the ExoFOP-TESS TOI list.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+    size : int
+        Number of TOIs.
+
+    Returns
+    -------
+    toi : DataFrame
+        The TOI list.
+    confirmed : DataFrame
+        Entries for the confirmed planets table of the confirmed TOIs.
+
+    """
+    import pandas as pd
+
+    # up to 2 TOIs per star
+    num = np.arange(size)
+    star = num // 2
+    ra, dec = _sky(rng, star[-1] + 1)
+    ra, dec = ra[star], dec[star]
+    rastr = _sexagesimal(ra, hours=True)
+    decstr = _sexagesimal(dec)
+    period = _periods(rng, star, num % 2 + 1, -0.3, 1.2)
+    disp = rng.choice(['PC', 'KP', 'CP', 'FP', ''], size,
+                      p=[0.6, 0.05, 0.1, 0.15, 0.1]).astype(object)
+    disp[disp == ''] = np.nan
+    # some candidates only have a single transit
+    period[(disp == 'PC') & (rng.random(size) < 0.03)] = np.nan
+    # spread over the first two years of the mission
+    alerted = (np.datetime64('2018-09-05T18:34:18') +
+               rng.integers(0, 790 * 86400, size).astype('timedelta64[s]'))
+    tic = 100000000 + star * 13
+
+    toi = pd.DataFrame({
+        'TIC ID': tic,
+        'TOI': np.round((101 + star) + (num % 2 + 1) / 100, 2),
+        'TFOPWG Disposition': disp,
+        'RA': rastr, 'Dec': decstr,
+        'Period (days)': period,
+        'Planet Radius (R_Earth)': 10**rng.uniform(-0.3, 1.3, size),
+        'Date TOI Alerted (UTC)': np.datetime_as_string(alerted).astype(
+            object),
+    })
+    toi['Date TOI Alerted (UTC)'] = toi['Date TOI Alerted (UTC)'].str.replace(
+        'T', ' ')
+
+    # match the positions the way they'll be read back in
+    from .coords import parse_sexagesimal
+    ra = parse_sexagesimal(rastr, hours=True)[0]
+    dec = parse_sexagesimal(decstr)[0]
+    con = np.isin(disp, ['KP', 'CP'])
+    facility = rng.choice(['Transiting Exoplanet Survey Satellite (TESS)',
+                           'SuperWASP', 'HATNet'], con.sum(),
+                          p=[0.7, 0.2, 0.1])
+    confirmed = _confirmed(rng, _names(['TOI-%d ', '%s'], 101 + star[con],
+                                       np.array(list('bc'))[num[con] % 2]),
+                           _names(['TIC %d'], tic[con]), ra[con], dec[con],
+                           period[con], facility, (2000, 2020))
+    return toi, confirmed
+
+
+def make_other(rng, size):
+    """
+    Make up the confirmed planets that weren't Kepler, K2, or TESS
+    candidates.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+    size : int
+
+    Returns
+    -------
+    DataFrame
+
+    """
+    import pandas as pd
+
+    ra, dec = _sky(rng, size)
+    num = np.arange(size)
+    masse = 10**rng.uniform(-1, 4, size)
+    masse[rng.random(size) < 0.3] = np.nan
+    rade = 10**rng.uniform(-0.3, 1.5, size)
+    rade[rng.random(size) < 0.8] = np.nan
+    method = rng.choice(list(METHODS), size, p=list(METHODS.values()))
+    return pd.DataFrame({
+        'pl_name': _names(['Star-%d b'], num),
+        'pl_hostname': _names(['Star-%d'], num), 'ra': ra, 'dec': dec,
+        'pl_orbper': 10**rng.uniform(-0.5, 5, size),
+        'pl_facility': rng.choice(['La Silla Observatory',
+                                   'W. M. Keck Observatory', 'SuperWASP',
+                                   'OGLE'], size),
+        'pl_discmethod': method,
+        'pl_disc': rng.integers(1989, 2021, size),
+        'pl_tranflag': (method == 'Transit').astype(int),
+        'pl_rade': rade, 'pl_radj': rade / 11.21,
+        'pl_bmasse': masse, 'pl_bmassj': masse / 317.8})
+
+
+def write_koi_releases(kepoi_names, outdir):
+    """
+    Write made up versions of the old KOI catalogs, each with more of the
+    KOIs than the last and the last with all of them.
+
+    Parameters
+    ----------
+    kepoi_names : array_like of str
+        Names of all the KOIs, e.g. 'K00001.01'.
+    outdir : str
+        Top level directory to put the catalogs in.
+
+    """
+    from glob import glob
+
+    import pandas as pd
+
+    from . import test_data
+
+    names = np.asarray(kepoi_names, dtype=str)
+    # the early catalogs are text tables of KOI numbers
+    numbers = np.char.lstrip(np.char.lstrip(names, 'K'), '0')
+    for ifile, frac, skip in zip(test_data.EARLY_KOIS, [0.1, 0.15], [0, 73]):
+        with open(os.path.join(outdir, ifile), 'w') as ff:
+            ff.write('#\n' * skip)
+            ff.write('\n'.join(numbers[:int(names.size * frac)]) + '\n')
+
+    # use the same names as the real ones so they sort into the same order
+    releases = ['q1_q06', 'q1_q08', 'q1_q12', 'q1_q16', 'q1_q17_dr24',
+                'q1_q17_dr25']
+    old = glob(os.path.join(outdir, test_data.KOI_RELEASES))
+    for ifile in old:
+        os.remove(ifile)
+    fracs = np.linspace(0.2, 1, len(releases))
+    for irel, frac in zip(releases, fracs):
+        path = test_data.KOI_RELEASES.replace('q*', f'{irel}_koi.csv')
+        pd.DataFrame({'kepoi_name': names[:int(np.ceil(names.size * frac))]}
+                     ).to_csv(os.path.join(outdir, path), index=False)
+
+
+def write_catalogs(outdir, scale=1, seed=0):
+    """
+    Write a full set of made up data tables.
+
+    Parameters
+    ----------
+    outdir : str
+        Top level directory to write the tables to. They go in the same
+        places under it as the real ones do under the repository.
+    scale : float, optional
+        How many times bigger than the real tables to make them. Default 1.
+    seed : int, optional
+        Random seed, so the same tables can be made again. Default 0.
+
+    Returns
+    -------
+    dict
+        Number of rows in each table.
+
+    """
+    import pandas as pd
+
+    from .utils import DATAFILES
+
+    rng = np.random.default_rng(seed)
+    sizes = {name: max(2, int(round(size * scale)))
+             for name, size in SIZES.items()}
+
+    koi, kepler = make_koi(rng, sizes['koi'])
+    k2, k2con = make_k2(rng, sizes['k2'])
+    toi, tess = make_toi(rng, sizes['toi'])
+    others = max(0, sizes['confirmed'] - len(kepler) - len(k2con) -
+                 len(tess))
+    con = pd.concat([kepler, k2con, tess, make_other(rng, others)],
+                    ignore_index=True)
+    con = con.iloc[rng.permutation(len(con))]
+
+    os.makedirs(os.path.join(outdir, 'data'), exist_ok=True)
+    for name, df in zip(DATAFILES, [con, koi, k2, toi]):
+        df.to_csv(os.path.join(outdir, DATAFILES[name]), index=False)
+    write_koi_releases(koi['kepoi_name'], outdir)
+    with open(os.path.join(outdir, 'data/last_update_time.txt'), 'w') as ff:
+        ff.write(UPDATE_TIME)
+
+    return {name: len(df) for name, df in zip(DATAFILES,
+                                              [con, koi, k2, toi])}
@@ -0,0 +1,328 @@
+from .crossmatch import cached_match
+from .profiling import stage
+from .utils import load_data
+
+# these first 2 KOI tables aren't archived on Exoplanet Archive
+EARLY_KOIS = ['data/koi1.txt', 'data/koi2.txt']
+# all the other KOI releases
+KOI_RELEASES = 'data/kepler-kois-q*'
+# year the early KOI tables were published
+EARLY_KOI_YEAR = 2011
+# year the other KOI releases were published, in sorted file name order
+KOI_RELEASE_YEARS = [2013, 2014, 2015, 2015, 2016, 2018]
+# the KOI names and years from all of the above compiled into one
+# memory-mappable file, plus a record of what it was compiled from
+KOI_BUNDLE = 'data/koi_releases.npy'
+KOI_BUNDLE_SOURCES = 'data/koi_releases.json'
+# bump this whenever compile_koi_releases changes what it produces
+KOI_BUNDLE_VERSION = 1
+
+# columns of the data tables used here (see columns.py)
+COLUMNS = {
+    'confirmed': ['pl_name', 'pl_disc', 'ra', 'dec', 'pl_orbper'],
+    'koi': ['kepoi_name', 'koi_disposition', 'ra', 'dec', 'koi_period'],
+    'k2': ['pl_name', 'epic_candname', 'k2c_disp', 'ra', 'dec', 'pl_orbper',
+           'year'],
+    'toi': ['disp', 'RA', 'Dec', 'period', 'year'],
+}
+# and the columns added to them
+NEW_COLUMNS = {
+    'confirmed': ['year_disc', 'disc_source'],
+    'koi': ['koi_year', 'year_disc', 'disc_source'],
+    'k2': ['year_disc', 'disc_source'],
+    'toi': ['year_disc', 'disc_source'],
+}
+
+
+def _koi_sources():
+    from glob import glob
+
+    from .cache import file_hash
+
+    # the first two tables are not glob'd, so they always come first
+    files = EARLY_KOIS + sorted(glob(KOI_RELEASES))
+    return {'version': KOI_BUNDLE_VERSION,
+            'files': {ifile: file_hash(ifile) for ifile in files}}
+
+
+def read_koi_releases():
+    """
+    Read the KOI names out of every old KOI catalog.
+
+    Returns
+    -------
+    DataFrame
+        kepoi_name and koi_year (the year the catalog was published) of
+        every KOI in every catalog, in the order they were published.
+
+    """
+    from glob import glob
+    import numpy as np
+    import pandas as pd
+
+    # load the two early KOI tables. Just use KOI names
+    k1 = np.loadtxt(EARLY_KOIS[0], dtype='<U12', usecols=(0,))
+    k2 = np.loadtxt(EARLY_KOIS[1], dtype='<U12', usecols=(0,), skiprows=73)
+    kois = [np.char.add('KOI-', np.concatenate((k1, k2))).astype('<U12')]
+    years = [np.full(k1.size + k2.size, EARLY_KOI_YEAR)]
+
+    # then the archived KOI tables in order
+    for ifile, iyear in zip(sorted(glob(KOI_RELEASES)), KOI_RELEASE_YEARS):
+        df = pd.read_csv(ifile, usecols=['kepoi_name'])
+        kois.append(df['kepoi_name'].str.replace('K0+', 'KOI-', regex=True))
+        years.append(np.full(len(df), iyear))
+
+    return pd.DataFrame({'kepoi_name': np.concatenate(kois),
+                         'koi_year': np.concatenate(years)})
+
+
+def compile_koi_releases():
+    """
+    Save the KOI names and years from every old KOI catalog to `KOI_BUNDLE`
+    so that `load_koi_releases` doesn't have to parse all the catalogs.
+
+    The catalogs never change, so this only ever needs to be rerun if a new
+    one is added.
+
+    """
+    import json
+
+    import numpy as np
+
+    df = read_koi_releases()
+    width = int(df['kepoi_name'].str.len().max())
+    bundle = np.empty(len(df), dtype=[('kepoi_name', f'S{width}'),
+                                      ('koi_year', 'i2')])
+    bundle['kepoi_name'] = df['kepoi_name'].str.encode('ascii')
+    bundle['koi_year'] = df['koi_year']
+    np.save(KOI_BUNDLE, bundle)
+
+    sources = _koi_sources()
+    with open(KOI_BUNDLE_SOURCES, 'w') as ff:
+        json.dump(sources, ff, indent=1, sort_keys=True)
+        ff.write('\n')
+    print(f'Saved {len(df)} KOIs from {len(sources["files"])} catalogs to '
+          f'{KOI_BUNDLE}')
+
+
+def load_koi_releases():
+    """
+    Load the KOI names and years from every old KOI catalog, using
+    `KOI_BUNDLE` if it is up to date and reading the catalogs otherwise.
+
+    Returns
+    -------
+    DataFrame
+        Same as `read_koi_releases`.
+
+    """
+    import json
+    import os
+
+    import numpy as np
+    import pandas as pd
+
+    if os.path.exists(KOI_BUNDLE) and os.path.exists(KOI_BUNDLE_SOURCES):
+        with open(KOI_BUNDLE_SOURCES, 'r') as ff:
+            sources = json.load(ff)
+        if sources == _koi_sources():
+            bundle = np.load(KOI_BUNDLE, mmap_mode='r')
+            return pd.DataFrame({
+                'kepoi_name': bundle['kepoi_name'].astype(str),
+                'koi_year': bundle['koi_year'].astype('int64')})
+        print(f'{KOI_BUNDLE} is out of date. Run python -m exoplots compile '
+              f'to update it.')
+    return read_koi_releases()
+
+
+def koi_first_year():
+    """
+    Find the year each KOI number first showed up in a KOI catalog.
+
+    Returns
+    -------
+    Series
+        Year of the first catalog with each KOI, indexed by KOI name.
+
+    """
+    first = load_koi_releases().drop_duplicates('kepoi_name')
+    return first.set_index('kepoi_name')['koi_year']
+
+
+def _last(positions):
+    # where each position last shows up, so that when a confirmed planet is
+    # matched more than once the last match wins
+    import numpy as np
+
+    _, last = np.unique(positions[::-1], return_index=True)
+    return np.sort(positions.size - 1 - last)
+
+
+def _link_years(dfcon, icon, dfcan, ican, canyr):
+    """
+    Give matched confirmed planets and candidates the same discovery year,
+    whichever of the two is earlier.
+
+    Parameters
+    ----------
+    dfcon : DataFrame
+        The confirmed planets table.
+    icon : ndarray
+        Position in `dfcon` of each matched confirmed planet.
+    dfcan : DataFrame
+        The candidate table.
+    ican : ndarray
+        Position in `dfcan` of each matched candidate.
+    canyr : ndarray
+        The candidates' own discovery years.
+
+    """
+    import numpy as np
+
+    conyr = dfcon['pl_disc'].to_numpy()[icon]
+    year = np.minimum(canyr, conyr)
+    # the candidate is the source if it's a tie
+    source = np.where(canyr <= conyr, dfcan['disc_source'].to_numpy()[ican],
+                      'confirmed:' + dfcon['pl_name'].to_numpy()[icon])
+
+    for df, pos in [(dfcan, ican), (dfcon, icon)]:
+        last = _last(pos)
+        for col, vals in [('year_disc', year), ('disc_source', source)]:
+            new = df[col].to_numpy().copy()
+            new[pos[last]] = vals[last]
+            df[col] = new
+
+
+@stage('discovery year')
+def get_discovery_year(data=None, strict=False, cache=True):
+    """
+    Simultaneously test the data to make sure we're counting each planet
+    exactly once and also set up the necessary links between planets on the
+    different tables to get year of discovery instead of year of confirmation
+    that is listed in the confirmed planets table.
+
+    Every problem found with the tables is reported (see `validate.check`).
+
+    Parameters
+    ----------
+    data : tuple of DataFrame, optional
+        The (dfcon, dfkoi, dfk2, dftoi) tables as returned by `load_data`.
+        They are updated in place. If not given, they are loaded fresh.
+    strict : bool, optional
+        Whether to raise an error if the tables fail any checks. Default
+        False.
+    cache : bool, optional
+        Whether to reuse the saved crossmatches (see `cached_match`), and the
+        cached tables if they have to be loaded. Default True.
+
+    Returns
+    -------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        The data tables with a year_disc column added to each, and a
+        disc_source column saying which table entry that year came from.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from . import validate
+
+    # load the data
+    if data is None:
+        data = load_data(cache=cache)
+    dfcon, dfkoi, dfk2, dftoi = data
+    matches = {}
+
+    # set up the appropriate columns
+    dfcon['year_disc'] = dfcon['pl_disc'] * 1
+    dfk2['year_disc'] = dfk2['year'] * 1
+    dfkoi['year_disc'] = 1950
+    dftoi['year_disc'] = dftoi['year'] * 1
+
+    # everything starts out discovered in its own table. when a candidate and
+    # a confirmed planet are matched up, whichever one came first (the
+    # candidate if it's a tie) is the source of both of their years
+    dfcon['disc_source'] = 'confirmed:' + dfcon['pl_name']
+    dfkoi['disc_source'] = 'koi:' + dfkoi['kepoi_name']
+    dfk2['disc_source'] = 'k2:' + dfk2['epic_candname']
+    dftoi['disc_source'] = 'toi:' + dftoi['TOI']
+
+    # match the K2 planets to the confirmed table by RA/Dec/Period
+    names = dfk2['epic_candname']
+    k2con = (dfk2['k2c_disp'] == 'Confirmed').to_numpy()
+    k2can = (dfk2['k2c_disp'] == 'Candidate').to_numpy()
+    nmatch, first = cached_match(dfcon, 'k2', names, dfk2['ra'], dfk2['dec'],
+                                 dfk2['pl_orbper'], disp=dfk2['k2c_disp'],
+                                 cache=cache)
+    matches['k2'] = nmatch
+    # the earliest year any entry for each candidate was published
+    k2yr = dfk2.groupby('epic_candname', dropna=False)['year'].transform(
+        'min').to_numpy()
+
+    # set the confirmed planet and the candidate to have the same discovery
+    # year
+    linked = k2con & (nmatch == 1)
+    _link_years(dfcon, first[linked], dfk2, np.flatnonzero(linked),
+                k2yr[linked])
+
+    # the special cases that don't match get the earliest year of any of
+    # their entries, as do the candidates
+    skipped = names.isin(validate.K2_UNMATCHED).to_numpy()
+    years = dfk2['year_disc'].to_numpy().copy()
+    years[skipped] = (dfk2['year_disc'][skipped]
+                      .groupby(names[skipped]).transform('min'))
+    years[k2can] = k2yr[k2can]
+    dfk2['year_disc'] = years
+
+    # first go through and assign KOIs the year they first showed up in a KOI
+    # catalog. We're assuming in this process that a particular KOI number will
+    # always refer to the same planet.
+    names = dfkoi['kepoi_name']
+    with stage('koi history'):
+        firstyear = koi_first_year()
+    dfkoi['koi_year'] = (names.map(firstyear).fillna(1990).astype('int64'))
+    dfkoi['year_disc'] = dfkoi['koi_year'] * 1
+
+    # there's not an easy way to tie confirmed planets in the KOI table to
+    # entries in the confirmed planets table. instead match by RA/Dec/Period
+    koicon = (dfkoi['koi_disposition'] == 'Confirmed').to_numpy()
+    nmatch, first = cached_match(dfcon, 'koi', names, dfkoi['ra'],
+                                 dfkoi['dec'], dfkoi['koi_period'],
+                                 disp=dfkoi['koi_disposition'], cache=cache)
+    matches['koi'] = nmatch
+
+    # special cases I know about that we can match up manually
+    manual, real, ncon = validate.koi_manual(dfcon, dfkoi, nmatch)
+    conpos = pd.Series(np.arange(len(dfcon)), index=dfcon['pl_name'])
+    conpos = conpos[~conpos.index.duplicated()]
+    manual[manual] = (ncon == 1).to_numpy()
+    first = first.copy()
+    first[manual] = real[(ncon == 1).to_numpy()].map(conpos).to_numpy()
+
+    # make sure both tables have the same discovery year
+    linked = koicon & ((nmatch == 1) | manual)
+    _link_years(dfcon, first[linked], dfkoi, np.flatnonzero(linked),
+                dfkoi['koi_year'].to_numpy()[linked])
+
+    # there's not an easy way to tie confirmed planets in the TOI table to
+    # entries in the confirmed planets table. instead match by RA/Dec/Period
+    names = dftoi['TOI']
+    toicon = (dftoi['disp'] == 'Confirmed').to_numpy()
+    nmatch, first = cached_match(dfcon, 'toi', names, dftoi['RA'],
+                                 dftoi['Dec'], dftoi['period'],
+                                 disp=dftoi['disp'], cache=cache)
+    matches['toi'] = nmatch
+    linked = toicon & (nmatch == 1)
+    _link_years(dfcon, first[linked], dftoi, np.flatnonzero(linked),
+                dftoi['year'].to_numpy()[linked])
+
+    # check all the tables against each other with the matches just found
+    report = validate.check({'confirmed': dfcon, 'koi': dfkoi, 'k2': dfk2,
+                             'toi': dftoi}, matches)
+    validate.save_report(report)
+    validate.enforce(report, strict=strict)
+
+    return dfcon, dfkoi, dfk2, dftoi
+
+
+if __name__ == "__main__":
+    get_discovery_year()
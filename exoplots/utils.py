@@ -0,0 +1,721 @@
+"""
+Utility functions needed for nearly every figure. Better to put things here
+once and then only change it once if a change is needed rather than
+copy/paste the same things for a new figure idea and have to track it down in
+every file it was used to change it.
+"""
+from contextlib import contextmanager
+
+from .profiling import stage
+
+# increase this any time the cleanup in load_data changes so that any cached
+# versions of the tables get rebuilt
+NORMALIZE_VERSION = 5
+
+# the data tables we load, as downloaded by download-planet-data.py
+DATAFILES = {
+    'confirmed': 'data/confirmed-planets.csv',
+    'koi': 'data/kepler-kois-full.csv',
+    'k2': 'data/k2-candidates-table.csv',
+    'toi': 'data/tess-candidates.csv',
+}
+
+# when the data tables were last downloaded (see `get_update_time`)
+UPDATE_TIME = 'data/last_update_time.txt'
+
+# columns load_data uses from each downloaded table (see columns.py)
+COLUMNS = {
+    'confirmed': ['pl_facility', 'pl_hostname', 'ra', 'dec', 'pl_orbper'],
+    'koi': ['koi_disposition', 'kepoi_name', 'kepid', 'koi_prad'],
+    'k2': ['epic_name', 'k2c_disp', 'k2c_reflink', 'pl_rade', 'pl_radj'],
+    'toi': ['TFOPWG Disposition', 'TIC ID', 'TOI', 'Period (days)',
+            'Planet Radius (R_Earth)', 'RA', 'Dec', 'Date TOI Alerted (UTC)'],
+}
+# and the columns it adds to them
+NEW_COLUMNS = {
+    'confirmed': ['status', 'url'],
+    'koi': ['koi_pradj', 'host', 'pl_facility', 'url'],
+    'k2': ['pl_facility', 'url', 'year'],
+    'toi': ['disp', 'TIC', 'period', 'prade', 'pradj', 'host', 'pl_facility',
+            'url', 'year'],
+}
+
+# how to read the columns of each table. anything not listed is left to pandas
+SCHEMA = {
+    'confirmed': {'ra': 'float64', 'dec': 'float64', 'pl_orbper': 'float64',
+                  'pl_rade': 'float64', 'pl_radj': 'float64',
+                  'pl_bmasse': 'float64', 'pl_bmassj': 'float64',
+                  'pl_disc': 'int16', 'pl_tranflag': 'int8'},
+    'koi': {'ra': 'float64', 'dec': 'float64', 'koi_period': 'float64',
+            'koi_prad': 'float64', 'kepid': 'int64'},
+    'k2': {'ra': 'float64', 'dec': 'float64', 'pl_orbper': 'float64',
+           'pl_rade': 'float64', 'pl_radj': 'float64',
+           'k2c_recentflag': 'int8'},
+    'toi': {'TIC ID': 'int64', 'TOI': 'float64', 'Period (days)': 'float64',
+            'Planet Radius (R_Earth)': 'float64'},
+}
+# text columns with only a handful of different values, stored as categoricals
+# once the tables are cleaned up
+CATEGORIES = {
+    'confirmed': ['pl_facility', 'pl_discmethod', 'status'],
+    'koi': ['koi_disposition', 'pl_facility'],
+    'k2': ['k2c_disp', 'pl_facility'],
+    'toi': ['disp', 'pl_facility'],
+}
+
+# where each column of the unified table (see unify) comes from in each of
+# the data tables
+UNIFIED = {
+    'name': {'confirmed': 'pl_name', 'koi': 'kepoi_name',
+             'k2': 'epic_candname', 'toi': 'TOI'},
+    'host': {'confirmed': 'pl_hostname', 'koi': 'host', 'k2': 'epic_name',
+             'toi': 'host'},
+    'mission': {'confirmed': 'pl_facility', 'koi': 'pl_facility',
+                'k2': 'pl_facility', 'toi': 'pl_facility'},
+    'status': {'confirmed': 'status', 'koi': 'koi_disposition',
+               'k2': 'k2c_disp', 'toi': 'disp'},
+    'method': {'confirmed': 'pl_discmethod'},
+    'ra': {'confirmed': 'ra', 'koi': 'ra', 'k2': 'ra', 'toi': 'RA'},
+    'dec': {'confirmed': 'dec', 'koi': 'dec', 'k2': 'dec', 'toi': 'Dec'},
+    'period': {'confirmed': 'pl_orbper', 'koi': 'koi_period',
+               'k2': 'pl_orbper', 'toi': 'period'},
+    'radius_e': {'confirmed': 'pl_rade', 'koi': 'koi_prad', 'k2': 'pl_rade',
+                 'toi': 'prade'},
+    'radius_j': {'confirmed': 'pl_radj', 'koi': 'koi_pradj', 'k2': 'pl_radj',
+                 'toi': 'pradj'},
+    'mass_e': {'confirmed': 'pl_bmasse'},
+    'mass_j': {'confirmed': 'pl_bmassj'},
+    'year_conf': {'confirmed': 'pl_disc'},
+    'year_disc': {'confirmed': 'year_disc', 'koi': 'year_disc',
+                  'k2': 'year_disc', 'toi': 'year_disc'},
+    'transits': {'confirmed': 'pl_tranflag'},
+    'recent': {'k2': 'k2c_recentflag'},
+    'url': {'confirmed': 'url', 'koi': 'url', 'k2': 'url', 'toi': 'url'},
+}
+# values for tables that don't have a column. the candidates all come from
+# transit surveys
+UNIFIED_DEFAULTS = {'method': 'Transit', 'transits': True, 'recent': True}
+
+# load_data needs to keep every column unify uses
+for _col, _sources in UNIFIED.items():
+    for _table, _source in _sources.items():
+        if _source not in COLUMNS[_table]:
+            COLUMNS[_table].append(_source)
+
+
+# jupiter/earth radius ratio
+RADRATIO = 11.21
+
+# how the TOI dispositions map to the statuses we report. things that don't
+# have a disposition are candidates, and anything else is left alone
+TOI_DISPOSITIONS = {'PC': 'Candidate', 'KP': 'Confirmed', 'CP': 'Confirmed'}
+
+# where do we want to point people to on clicking?
+URLS = {
+    'confirmed': 'https://exoplanetarchive.ipac.caltech.edu/overview/{}',
+    'koi': 'https://exoplanetarchive.ipac.caltech.edu/cgi-bin/Display'
+           'Overview/nph-DisplayOverview?objname={}&type=KEPLER_TCE_HOST',
+    'k2': 'https://exofop.ipac.caltech.edu/k2/edit_target.php?id={}',
+    'toi': 'https://exofop.ipac.caltech.edu/tess/target.php?id={}',
+}
+
+
+def _map_unique(values, func):
+    """
+    Apply `func` to each of the unique `values` and spread the results back
+    out, which saves a lot of work on columns with many repeats.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([func(ival) for ival in uniques] + [np.nan],
+                      dtype=object)
+    # missing values have code -1, which picks out the NaN at the end
+    return pd.Series(mapped[codes], index=values.index)
+
+
+def _rename_columns(tables):
+    """Get easier to reference names for things in the ExoFOP listing."""
+    renames = {'TFOPWG Disposition': 'disp', 'TIC ID': 'TIC',
+               'Period (days)': 'period',
+               'Planet Radius (R_Earth)': 'prade'}
+    tables['toi'].rename(columns=renames, inplace=True)
+
+
+def _statuses(tables):
+    """Set the status of every planet and candidate the way we report it."""
+    dfcon, dfkoi, dfk2, dftoi = (tables[name] for name in DATAFILES)
+    # set all of these planets as confirmed
+    dfcon['status'] = 'Confirmed'
+    dftoi['disp'] = dftoi['disp'].fillna('PC').replace(TOI_DISPOSITIONS)
+    # make these not all caps
+    dfkoi['koi_disposition'] = _map_unique(dfkoi['koi_disposition'],
+                                           str.title)
+    dfk2['k2c_disp'] = _map_unique(dfk2['k2c_disp'], str.title)
+
+
+def _facilities(tables):
+    """Set the discovery facility of everything."""
+    # replace the long name with just TESS
+    full = 'Transiting Exoplanet Survey Satellite (TESS)'
+    tables['confirmed']['pl_facility'] = (
+        tables['confirmed']['pl_facility'].replace({full: 'TESS'}))
+    # set the appropriate discover facility for candidates
+    tables['koi']['pl_facility'] = 'Kepler'
+    tables['k2']['pl_facility'] = 'K2'
+    tables['toi']['pl_facility'] = 'TESS'
+
+
+def _coordinates(tables):
+    """Convert the TOI sexagesimal coordinates to degrees."""
+    from .coords import parse_sexagesimal
+
+    dftoi = tables['toi']
+    dftoi['RA'], nbadra = parse_sexagesimal(dftoi['RA'], hours=True)
+    dftoi['Dec'], nbaddec = parse_sexagesimal(dftoi['Dec'])
+    if nbadra + nbaddec > 0:
+        print(f'Unable to parse {nbadra} TOI RAs and {nbaddec} TOI Decs.')
+
+
+def _names(tables):
+    """Set names to strings we'd want to show in a figure."""
+    dfkoi, dftoi = tables['koi'], tables['toi']
+    dftoi['TOI'] = 'TOI-' + dftoi['TOI'].astype(str)
+    dftoi['host'] = 'TIC ' + dftoi['TIC'].astype(str)
+    dfkoi['host'] = 'KIC ' + dfkoi['kepid'].astype(str)
+    # make KOI strings into the format we expect
+    dfkoi['kepoi_name'] = dfkoi['kepoi_name'].str.replace('K0+', 'KOI-',
+                                                          regex=True)
+
+
+def _radii(tables):
+    """Fill in radii in both Earth and Jupiter units."""
+    import numpy as np
+
+    dfkoi, dfk2, dftoi = tables['koi'], tables['k2'], tables['toi']
+    # give KOIs/TOIs units of Jupiter radii
+    dfkoi['koi_pradj'] = dfkoi['koi_prad'] / RADRATIO
+    dftoi['pradj'] = dftoi['prade'] / RADRATIO
+
+    # K2 tables don't have both columns always filled in
+    rade = dfk2['pl_rade'].to_numpy()
+    radj = dfk2['pl_radj'].to_numpy()
+    dfk2['pl_rade'] = np.where(np.isfinite(rade), rade, radj * RADRATIO)
+    dfk2['pl_radj'] = np.where(np.isfinite(radj), radj, rade / RADRATIO)
+
+
+def _urls(tables):
+    """Set where clicking on each planet takes you."""
+    dfcon, dfkoi, dfk2, dftoi = (tables[name] for name in DATAFILES)
+    dfcon['url'] = _map_unique(dfcon['pl_hostname'],
+                               URLS['confirmed'].format)
+    dfk2['url'] = _map_unique(dfk2['epic_name'].str.slice(5),
+                              URLS['k2'].format)
+    dfkoi['url'] = _map_unique(dfkoi['kepoi_name'].str.slice(0, -3),
+                               URLS['koi'].format)
+    dftoi['url'] = _map_unique(dftoi['TIC'].astype(str), URLS['toi'].format)
+
+
+def _duplicates(tables):
+    """KOI-1101.02 is a known duplicate of 1101.01. Remove it."""
+    dfkoi = tables['koi']
+    tables['koi'] = dfkoi[dfkoi['kepoi_name'] != 'KOI-1101.02']
+
+
+def _toi_statuses(tables, cache=True):
+    """
+    The TOI list from ExoFOP isn't always kept synced with the confirmed
+    planets table, so do some shifting of categories here. With `cache`
+    False, the saved crossmatches aren't used (see `cached_match`).
+    """
+    from .crossmatch import cached_match
+
+    dftoi = tables['toi']
+    # match planets between tables by RA/Dec/Period
+    nmatch, _ = cached_match(tables['confirmed'], 'toi', dftoi['TOI'],
+                             dftoi['RA'], dftoi['Dec'], dftoi['period'],
+                             disp=dftoi['disp'], cache=cache)
+
+    toicon = dftoi['disp'] == 'Confirmed'
+    toican = dftoi['disp'] == 'Candidate'
+
+    # any supposedly confirmed TOIs that aren't in the table get demoted back
+    # to candidate
+    dftoi.loc[toicon & (nmatch == 0), 'disp'] = 'Candidate'
+
+    # any candidates in the confirmed table get set as such
+    dftoi.loc[toican & (nmatch == 1), 'disp'] = 'Confirmed'
+
+
+def _years(tables):
+    """Add the year the K2 candidates were published and TOIs alerted."""
+    dfk2, dftoi = tables['k2'], tables['toi']
+    dfk2['year'] = (dfk2['k2c_reflink'].str.extract(r'ET_AL__(.{4})',
+                                                    expand=False)
+                    .astype('int64'))
+    dftoi['year'] = dftoi['Date TOI Alerted (UTC)'].str.slice(0, 4).astype(
+        'int64')
+
+
+# everything load_data does to clean up the tables, in order
+NORMALIZE_STEPS = [_rename_columns, _statuses, _coordinates, _names, _radii,
+                   _facilities, _urls, _duplicates, _toi_statuses, _years]
+
+
+def read_table(name):
+    """
+    Read one of the downloaded data tables according to its `SCHEMA`.
+
+    Only the columns something uses (see columns.py) are read.
+
+    Parameters
+    ----------
+    name : str
+        One of the tables in `DATAFILES`.
+
+    Returns
+    -------
+    DataFrame
+
+    """
+    import pandas as pd
+
+    from .columns import download_columns
+
+    cols = set(download_columns(name))
+    # a callable so that a column missing from the file isn't an error here,
+    # just whenever something tries to use it
+    with stage(f'parse {name}'):
+        return pd.read_csv(DATAFILES[name], usecols=lambda col: col in cols,
+                           dtype=SCHEMA[name])
+
+
+def memory_report():
+    """
+    Print how much memory the data tables take up when read naively versus
+    as cleaned up by `load_data`.
+
+    """
+    import pandas as pd
+
+    dfs = load_data(cache=False)
+    print(f'{"table":>10} {"all columns":>12} {"load_data":>12}')
+    for name, df in zip(DATAFILES, dfs):
+        before = pd.read_csv(DATAFILES[name], low_memory=False)
+        mbefore = before.memory_usage(deep=True).sum() / 1e6
+        mafter = df.memory_usage(deep=True).sum() / 1e6
+        print(f'{name:>10} {mbefore:9.2f} MB {mafter:9.2f} MB')
+
+
+def get_update_time():
+    """
+    Return a datetime object representing the last time all the data files
+    were generated.
+
+    Returns
+    -------
+    datetime.datetime
+
+    """
+    import datetime
+    with open(UPDATE_TIME, 'r') as ff:
+        lines = ff.readlines()
+    return datetime.datetime.strptime(lines[0], '%Y-%m-%d %H:%M:%S.%f')
+
+
+def unify(dfcon, dfkoi, dfk2, dftoi):
+    """
+    Combine the four data tables into one with the same column names for
+    everything.
+
+    Parameters
+    ----------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        The data tables as returned by `load_data` or `get_discovery_year`.
+
+    Returns
+    -------
+    DataFrame
+        Every row of every table, in order, with the columns in `UNIFIED`
+        plus the table each row came from and has_period, has_radius, and
+        has_mass columns saying which values are finite. Columns missing from
+        a table are NaN unless they have a value in `UNIFIED_DEFAULTS`.
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    parts = []
+    for name, df in zip(DATAFILES, [dfcon, dfkoi, dfk2, dftoi]):
+        part = {'table': np.full(len(df), name)}
+        for col, sources in UNIFIED.items():
+            if sources.get(name) in df:
+                part[col] = df[sources[name]].to_numpy()
+            else:
+                part[col] = np.full(len(df), UNIFIED_DEFAULTS.get(col, np.nan))
+        parts.append(pd.DataFrame(part))
+    df = pd.concat(parts, ignore_index=True)
+
+    for col in ['table', 'mission', 'status', 'method']:
+        df[col] = df[col].astype('category')
+    for col in ['year_conf', 'year_disc']:
+        df[col] = df[col].astype('float64').astype('Int16')
+    for col in ['transits', 'recent']:
+        df[col] = df[col].astype(bool)
+
+    df['has_period'] = np.isfinite(df['period'])
+    df['has_radius'] = np.isfinite(df['radius_e'])
+    df['has_mass'] = np.isfinite(df['mass_e'])
+    return df
+
+
+def normalize(dfcon, dfkoi, dfk2, dftoi, cache=True):
+    """
+    Clean up the tables as read in by `read_table` by running all the
+    `NORMALIZE_STEPS` and dropping any columns nothing uses.
+
+    Parameters
+    ----------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        The confirmed planets, KOI, K2 candidates, and TOI tables. They may
+        be changed in place.
+    cache : bool, optional
+        Whether to reuse the saved crossmatches of the TOIs. Default True.
+
+    Returns
+    -------
+    dfcon, dfkoi, dfk2, dftoi : DataFrame
+        Same as `load_data`.
+
+    """
+    from . import columns
+
+    tables = {'confirmed': dfcon, 'koi': dfkoi, 'k2': dfk2, 'toi': dftoi}
+    for step in NORMALIZE_STEPS:
+        with stage(step.__name__.strip('_')):
+            # only the TOI statuses reuse saved work (the crossmatches)
+            if step is _toi_statuses:
+                step(tables, cache=cache)
+            else:
+                step(tables)
+
+    for name in DATAFILES:
+        # only keep the columns something actually uses
+        tables[name] = columns.restrict(tables[name], name)
+        for col in CATEGORIES[name]:
+            tables[name][col] = tables[name][col].astype('category')
+
+    return tuple(tables[name] for name in DATAFILES)
+
+
+@stage('load data')
+def load_data(cache=True, unified=False):
+    """
+    Load our data tables and perform some data cleansing/updating to make them
+    ready for use in our interactive figures.
+
+    Parameters
+    ----------
+    cache : bool, optional
+        Whether to use the cached copy of the cleaned up tables if the source
+        files haven't changed (and save one if they have), and the saved
+        crossmatches. Default True.
+    unified : bool, optional
+        Return all the tables combined into one (see `unify`), with discovery
+        years. Default False.
+
+    Returns
+    -------
+    dfcon : DataFrame
+        All planets in the Exoplanet Archive confirmed planets table.
+    dfkoi : DataFrame
+        All planets in the Exoplanet Archive KOI planets table.
+    dfk2 : DataFrame
+        All planets in the Exoplanet Archive K2 planet candidates table.
+    dftoi : DataFrame
+        All planets in the ExoFOP-TESS planet candidates table.
+
+    """
+    if unified:
+        from .ledger import discovery_years
+        return unify(*discovery_years(load_data(cache=cache), cache=cache))
+
+    from . import columns
+    from .cache import cache_key, read_cache, write_cache
+    # load the data files
+    datafile = DATAFILES['confirmed']
+    k2file = DATAFILES['k2']
+    koifile = DATAFILES['koi']
+    toifile = DATAFILES['toi']
+
+    # skip all the work below if nothing has changed since last time
+    names = ['confirmed', 'koi', 'k2', 'toi']
+    if cache:
+        # the cached tables only have the registered columns
+        key = cache_key([datafile, koifile, k2file, toifile],
+                        f'{NORMALIZE_VERSION}-{columns.signature()}')
+        dfs = read_cache(key, names)
+        if dfs is not None:
+            return dfs
+
+    dfcon = read_table('confirmed')
+    dfk2 = read_table('k2')
+    dfkoi = read_table('koi')
+    dftoi = read_table('toi')
+
+    dfcon, dfkoi, dfk2, dftoi = normalize(dfcon, dfkoi, dfk2, dftoi,
+                                          cache=cache)
+
+    if cache:
+        write_cache(key, names, [dfcon, dfkoi, dfk2, dftoi])
+
+    return dfcon, dfkoi, dfk2, dftoi
+
+
+def write_if_changed(path, text):
+    """
+    Write text to a file, but only if that would change the file.
+
+    The text goes to a temporary file first that is then moved into place, so
+    the file is never left half written.
+
+    Parameters
+    ----------
+    path : str
+    text : str
+
+    Returns
+    -------
+    bool
+        Whether the file was written.
+
+    """
+    import os
+
+    contents = text.encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as ff:
+            if ff.read() == contents:
+                return False
+
+    tmpfile = path + '.part'
+    try:
+        with open(tmpfile, 'wb') as ff:
+            ff.write(contents)
+        os.replace(tmpfile, path)
+    finally:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+    return True
+
+
+# the only version of bokeh whose internals `stable_ids` is known to work
+# with. it has to be checked again before moving to any other version
+BOKEH_VERSION = '2.1.1'
+
+# the UUIDs handed out for the figure being made (see `stable_ids`)
+_uuids = {'seed': '', 'count': 0}
+
+
+def _stable_uuid():
+    # stands in for the random UUIDs bokeh gives documents and HTML elements
+    import hashlib
+    import uuid
+
+    _uuids['count'] += 1
+    digest = hashlib.sha256(f'{_uuids["seed"]}-{_uuids["count"]}'.encode())
+    return str(uuid.UUID(bytes=digest.digest()[:16], version=4))
+
+
+def _sorted_references(references):
+    # stands in for bokeh's references_json, which lists the models in
+    # whatever order they happen to be in memory
+    from bokeh.document.util import references_json
+
+    return references_json(sorted(references, key=lambda ref: ref.id))
+
+
+def _visit_sorted(value, visitor):
+    # stands in for bokeh's _visit_immediate_value_references, which goes
+    # through the properties of each model in an order that changes from run
+    # to run. some models (e.g. titles) are only created the first time
+    # they're looked at, so that order decides how they're numbered
+    from bokeh import model
+    from bokeh.core.has_props import HasProps
+
+    if isinstance(value, HasProps):
+        for attr in sorted(value.properties_with_refs()):
+            model._visit_value_and_its_immediate_references(
+                getattr(value, attr), visitor)
+    else:
+        model._visit_value_and_its_immediate_references(value, visitor)
+
+
+@contextmanager
+def stable_ids(seed):
+    """
+    Make the figure made inside this context come out exactly the same
+    every time it's made from the same inputs.
+
+    Bokeh normally gives every document and HTML element a random UUID and
+    goes through and lists the models of a document in no particular order,
+    so every output file would change on every build. Instead, number the
+    models up from a starting point and make the UUIDs both based on `seed`,
+    and go through and list the models in a set order.
+
+    This swaps out some of bokeh's private functions, which are put back
+    afterward. Since those can change in any release, anything but
+    `BOKEH_VERSION` is an error rather than silently giving different files.
+
+    Parameters
+    ----------
+    seed : str
+        Anything that changes whenever the figure does, e.g. a hash of all
+        its inputs.
+
+    """
+    import hashlib
+
+    import bokeh
+    from bokeh import model
+    from bokeh.document import document
+    from bokeh.embed import util
+    from bokeh.util import serialization
+
+    swaps = [(util, 'make_globally_unique_id', _stable_uuid),
+             (document, 'references_json', _sorted_references),
+             (model, '_visit_immediate_value_references', _visit_sorted)]
+    missing = [f'{mod.__name__}.{name}' for mod, name, _ in swaps +
+               [(serialization, '_simple_id', None)]
+               if not hasattr(mod, name)]
+    if bokeh.__version__ != BOKEH_VERSION or missing:
+        raise ValueError(f'Reproducible figures need bokeh {BOKEH_VERSION}, '
+                         f'not {bokeh.__version__}' +
+                         (f' (missing {", ".join(missing)})' if missing
+                          else ''))
+
+    originals = [getattr(mod, name) for mod, name, _ in swaps]
+    simple_id = serialization._simple_id
+    for mod, name, func in swaps:
+        setattr(mod, name, func)
+    _uuids['seed'] = seed
+    _uuids['count'] = 0
+    # every model ID is 10 digits long
+    start = int(hashlib.sha256(seed.encode()).hexdigest()[:8], 16)
+    serialization._simple_id = 10**9 + start % 10**9
+    try:
+        yield
+    finally:
+        for (mod, name, _), func in zip(swaps, originals):
+            setattr(mod, name, func)
+        # IDs handed out from here on are far below the ones used above
+        serialization._simple_id = simple_id
+
+
+def save_figure(fig, fullfile, embedfile, title, theme, optimize=False,
+                derived=None):
+    """
+    Save a figure both as a standalone HTML page and as the pieces needed to
+    embed it in one of our pages.
+
+    Files are only written if their contents changed. With sidecars on (see
+    sidecars.py), the embedded figure gets its data from separate files.
+
+    Parameters
+    ----------
+    fig : bokeh.plotting.Figure
+        The figure to save.
+    fullfile : str
+        Where to save the full HTML page.
+    embedfile : str
+        Where to save the script and div to embed the figure.
+    title : str
+        Title of the full HTML page.
+    theme : bokeh.themes.Theme
+        Theme to apply to the figure.
+    optimize : bool, optional
+        Whether to cut the data down to what the figure needs first (see
+        payload.py) and print how much smaller the data got. Default False.
+    derived : dict, optional
+        Columns the browser can work out itself instead (see
+        `payload.optimize`).
+
+    """
+    from bokeh.embed import components, file_html
+    from bokeh.io import curdoc
+    from bokeh.resources import CDN
+
+    from . import payload, sidecars
+
+    curdoc().theme = theme
+    if optimize:
+        with stage('optimize'):
+            before, after = payload.optimize(fig, derived=derived)
+
+    with stage('save'):
+        write_if_changed(fullfile, file_html(fig, CDN, title=title,
+                                             theme=theme))
+
+    # the embedded figure can load its data from separate files instead
+    if sidecars.enabled():
+        sidecars.externalize(fig)
+
+    # save the individual pieces so we can just embed the figure without the
+    # whole html page
+    with stage('components'):
+        script, div = components(fig, theme=theme)
+    write_if_changed(embedfile, script + div)
+    if optimize:
+        print(f'{embedfile}: {len(script + div) / 1e3:,.1f} kB, with the '
+              f'data cut from {before / 1e3:,.1f} to {after / 1e3:,.1f} kB')
+
+
+def log_axis_labels(min_tick=-2.001, max_tick=3.):
+    """
+    Bokeh can't do subscript or superscript text, which includes scientific
+    notation in axis labels. This is a hack script that uses unicode
+    superscript values and manually creates pseudo-scientific notation axis
+    labels. Any values within log10(min_tick) and log10(max_tick) will be
+    displayed as normal, while outside those bounds in either direction will
+    be converted to scientific notation.
+
+    Parameters
+    ----------
+    min_tick : float, optional
+        Maximum small log(10) value that will display in scientific notation
+        instead of the full decimal representation. The default is -2.001,
+        meaning axis labels will go from 9x10^-3 to 0.01.
+    max_tick : float, optional
+        Minimum large log(10) value that will display in scientific notation
+        instead of the full decimal representation. The default is 3, meaning
+        axis labels will go from 999 to 10^3.
+
+    Returns
+    -------
+    str:
+        JavaScript code function that generates the appropriate tick labels.
+
+    """
+    return f"""
+var logtick = Math.log10(tick);
+if ((logtick > {min_tick}) && (logtick < {max_tick})){{
+    return tick.toLocaleString();
+}} else {{
+    var power = Math.floor(logtick);
+    var retval = 10 + (power.toString()
+             .split('')
+             .map(function (d) {{ return d === '-' ? '⁻' : '⁰¹²³⁴⁵⁶⁷⁸⁹'[+d]; }})
+             .join(''));
+    var front = (tick/Math.pow(10, power)).toPrecision(2).toString().slice(0,3);
+    
+    if (front == '1.0'){{
+        return retval
+    }}
+    else if (front.slice(1,3) == '.0'){{
+        return front[0] + 'x' + retval
+    }}
+    
+    return front + 'x' + retval
+}}
+    """
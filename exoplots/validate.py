@@ -0,0 +1,301 @@
+"""
+Checks that the data tables are consistent with each other, so that we count
+every planet exactly once.
+
+Every check is run on a whole table at once and reports every entry that
+breaks it rather than stopping at the first one, so a single bad entry in
+the nightly download doesn't hide any others. Known exceptions to the checks
+are kept in the lookup tables below.
+
+The violations found the last time the tables were checked are saved to
+`REPORT`. By default they are only printed, but in strict mode (e.g. for the
+nightly build) any violation is an error.
+"""
+import json
+import os
+
+# where the violations from the last check are saved
+REPORT = 'data/validation_report.json'
+
+# confirmed K2 planets that don't match exactly one confirmed planet. all
+# these just have very slight differences in period (< 0.2 days) or are off
+# by factors of 2 since different groups found different things for the same
+# planet
+K2_UNMATCHED = {
+    'EPIC 201505350.01', 'EPIC 201596316.01', 'EPIC 201629650.01',
+    'EPIC 201637175.01', 'EPIC 201647718.01', 'EPIC 203771098.01',
+    'EPIC 206348688.02', 'EPIC 210968143.01', 'EPIC 212394689.02',
+    'EPIC 212672300.01',
+    # XXX: until this is fixed (the Kruse and Helller .03 are different
+    # planets)
+    'EPIC 201497682.03',
+}
+
+# K2 candidates that do match a confirmed planet.
+# 202126849.01 is HAT-P-54, 212555594.02 is K2-192
+# EPIC 201357835.01 is K2-245, but that has a different EPIC (201357643)
+K2_CANDIDATE_MATCHED = {'EPIC 202126849.01', 'EPIC 212555594.02',
+                        'EPIC 201357835.01'}
+
+# confirmed KOIs that don't match exactly one confirmed planet, and what
+# their name is in the confirmed planets table. all these just have very
+# slight differences in period (< 0.2 days) which my conservative selection
+# rejects but are good enough (KOI-4441 and 5475 was a KOI at half the period
+# of the confirmed planet and 5568 a KOI at 1/3 the confirmed period)
+KOI_MANUAL = {
+    'KOI-806.01': 'Kepler-30 d',
+    'KOI-806.03': 'Kepler-30 b',
+    'KOI-142.01': 'KOI-142 b',
+    'KOI-1274.01': 'Kepler-421 b',
+    'KOI-1474.01': 'Kepler-419 b',
+    'KOI-1599.01': 'KOI-1599.01',
+    'KOI-377.01': 'Kepler-9 b',
+    'KOI-377.02': 'Kepler-9 c',
+    'KOI-4441.01': 'Kepler-1604 b',
+    'KOI-5568.01': 'Kepler-1633 b',
+    'KOI-5475.01': 'Kepler-1632 b',
+    'KOI-5622.01': 'Kepler-1635 b',
+    'KOI-277.02': 'Kepler-36 b',
+    'KOI-523.02': 'Kepler-177 b',
+    'KOI-1783.02': 'KOI-1783.02',
+}
+
+# the years KOIs first showed up in a KOI catalog
+KOI_YEARS = (2011, 2018)
+
+# anything discovered after this is a placeholder that never got replaced
+LAST_YEAR = 2040
+
+
+def violations(rule, table, ids, bad, detail=''):
+    """
+    List every entry of a table that breaks a rule.
+
+    Parameters
+    ----------
+    rule : str
+        Short name of the rule.
+    table : str
+        Which table the entries are from.
+    ids : Series
+        Name of every entry in the table.
+    bad : array_like of bool
+        Which entries break the rule.
+    detail : str or array_like of str, optional
+        Explanation of each violation.
+
+    Returns
+    -------
+    DataFrame
+        With rule, table, id, and detail columns and one row per violation.
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    bad = np.asarray(bad, dtype=bool)
+    detail = np.broadcast_to(np.asarray(detail, dtype=object), bad.shape)
+    return pd.DataFrame({'rule': rule, 'table': table,
+                         'id': np.asarray(ids, dtype=object)[bad],
+                         'detail': detail[bad]},
+                        columns=['rule', 'table', 'id', 'detail'])
+
+
+def _nmatch_detail(nmatch):
+    import pandas as pd
+
+    return ('matches ' + pd.Series(nmatch).astype(str) +
+            ' confirmed planets').to_numpy()
+
+
+def koi_manual(dfcon, dfkoi, nmatch):
+    """
+    Find the confirmed KOIs that have to be matched up with their confirmed
+    planet by hand (see `KOI_MANUAL`).
+
+    Parameters
+    ----------
+    dfcon, dfkoi : DataFrame
+        The confirmed planets and KOI tables.
+    nmatch : ndarray
+        How many confirmed planets each KOI matches by RA/Dec/Period.
+
+    Returns
+    -------
+    manual : ndarray of bool
+        Which KOIs are matched by hand.
+    real : Series
+        The name of the confirmed planet each of those is.
+    ncon : Series
+        How many times each of those names is in the confirmed table.
+
+    """
+    names = dfkoi['kepoi_name']
+    koicon = (dfkoi['koi_disposition'] == 'Confirmed').to_numpy()
+    manual = koicon & (nmatch != 1) & names.isin(KOI_MANUAL).to_numpy()
+    real = names[manual].map(KOI_MANUAL)
+    ncon = real.map(dfcon['pl_name'].value_counts()).fillna(0).astype(int)
+    return manual, real, ncon
+
+
+def check(tables, matches):
+    """
+    Check that the data tables are consistent with each other.
+
+    Parameters
+    ----------
+    tables : dict
+        The confirmed, koi, k2, and toi tables with their discovery years
+        (see `get_discovery_year`).
+    matches : dict
+        For the koi, k2, and toi tables, how many confirmed planets each
+        entry matches by RA/Dec/Period (see `cached_match`).
+
+    Returns
+    -------
+    DataFrame
+        Every violation found, as returned by `violations`.
+
+    """
+    import pandas as pd
+
+    dfcon = tables['confirmed']
+    report = []
+
+    # check that we're including all K2 planets, but only counting them once
+    dfk2 = tables['k2']
+    names = dfk2['epic_candname']
+    nmatch = matches['k2']
+    detail = _nmatch_detail(nmatch)
+    k2con = (dfk2['k2c_disp'] == 'Confirmed').to_numpy()
+    k2can = (dfk2['k2c_disp'] == 'Candidate').to_numpy()
+    named = dfk2['pl_name'].isin(dfcon['pl_name']).to_numpy()
+
+    # all K2 confirmed planets are already in the confirmed planets table
+    report.append(violations('confirmed-named', 'k2', names, k2con & ~named,
+                             'planet name not in the confirmed table'))
+    # anything with a planet name in the K2 table but still a candidate hasn't
+    # already shown up in the confirmed planets table
+    report.append(violations('candidate-named', 'k2', names, k2can & named,
+                             'planet name already in the confirmed table'))
+    # make sure all confirmed K2 planets are in the confirmed table exactly
+    # once, other than special cases I know about that we can ignore
+    skipped = names.isin(K2_UNMATCHED).to_numpy()
+    report.append(violations('confirmed-match', 'k2', names,
+                             k2con & (nmatch != 1) & ~skipped, detail))
+    # and that all candidate K2 planets aren't
+    report.append(violations(
+        'candidate-match', 'k2', names,
+        k2can & (nmatch != 0) & ~names.isin(K2_CANDIDATE_MATCHED), detail))
+    # candidates are checked by the year of each of their entries, not just
+    # the earliest
+    years = dfk2['year_disc'].where(~k2can, dfk2['year'])
+    report.append(violations('year-range', 'k2', names, years >= LAST_YEAR,
+                             'discovered after ' + str(LAST_YEAR)))
+
+    # KOIs should first show up in one of the KOI catalogs
+    dfkoi = tables['koi']
+    names = dfkoi['kepoi_name']
+    nmatch = matches['koi']
+    detail = _nmatch_detail(nmatch)
+    koicon = (dfkoi['koi_disposition'] == 'Confirmed').to_numpy()
+    koican = (dfkoi['koi_disposition'] == 'Candidate').to_numpy()
+    lo, hi = KOI_YEARS
+    report.append(violations('year-range', 'koi', names,
+                             ~dfkoi['koi_year'].between(lo, hi),
+                             f'not first in a catalog from {lo} to {hi}'))
+
+    # the special cases matched up by hand have to be in the confirmed table
+    # exactly once
+    manual, real, ncon = koi_manual(dfcon, dfkoi, nmatch)
+    report.append(violations(
+        'manual-match', 'koi', names[manual], ncon != 1,
+        (real + ' is in the confirmed table ' + ncon.astype(str) +
+         ' times').to_numpy()))
+    # make sure all confirmed KOIs are in the confirmed table exactly once
+    # and all candidate KOIs aren't
+    report.append(violations(
+        'confirmed-match', 'koi', names,
+        koicon & (nmatch != 1) & ~names.isin(KOI_MANUAL), detail))
+    report.append(violations('candidate-match', 'koi', names,
+                             koican & (nmatch != 0), detail))
+
+    # same for the TOIs
+    dftoi = tables['toi']
+    names = dftoi['TOI']
+    nmatch = matches['toi']
+    detail = _nmatch_detail(nmatch)
+    toicon = (dftoi['disp'] == 'Confirmed').to_numpy()
+    toican = (dftoi['disp'] == 'Candidate').to_numpy()
+    report.append(violations('confirmed-match', 'toi', names,
+                             toicon & (nmatch != 1), detail))
+    report.append(violations('candidate-match', 'toi', names,
+                             toican & (nmatch != 0), detail))
+
+    return pd.concat(report, ignore_index=True)
+
+
+def save_report(report):
+    """
+    Save a set of violations to `REPORT`.
+
+    Parameters
+    ----------
+    report : DataFrame
+        Violations as returned by `violations`.
+
+    """
+    report = report.sort_values(['rule', 'table', 'id'], kind='stable')
+    with open(REPORT, 'w') as ff:
+        json.dump(report.to_dict('records'), ff, indent=1)
+        ff.write('\n')
+
+
+def load_report():
+    """
+    Load the violations saved by `save_report`.
+
+    Returns
+    -------
+    DataFrame
+
+    """
+    import pandas as pd
+
+    if not os.path.exists(REPORT):
+        return violations('', '', [], [])
+    with open(REPORT, 'r') as ff:
+        return pd.DataFrame(json.load(ff),
+                            columns=['rule', 'table', 'id', 'detail'])
+
+
+def enforce(report, strict=False):
+    """
+    Print a summary of a set of violations.
+
+    Parameters
+    ----------
+    report : DataFrame
+        Violations as returned by `violations`.
+    strict : bool, optional
+        Whether to raise an error if there are any violations. Default
+        False.
+
+    Raises
+    ------
+    ValueError
+        If `strict` and there are any violations.
+
+    """
+    if len(report) == 0:
+        print('All data table checks passed.')
+        return
+
+    for (rule, table), grp in report.groupby(['rule', 'table'], sort=True):
+        print(f'{len(grp)} {table} entries failed {rule}:')
+        for _, row in grp.iterrows():
+            print(f'    {row["id"]}: {row["detail"]}')
+    msg = f'{len(report)} data table check(s) failed. See {REPORT}.'
+    if strict:
+        raise ValueError(msg)
+    print(msg)
@@ -1,2 +1,2 @@
 set -e
-for f in scripts/*.py; do python "$f"; done
+python -m exoplots build --strict